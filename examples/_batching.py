@@ -0,0 +1,49 @@
+"""Helper for the examples: print streamed text in batches instead of per token."""
+
+import time
+from typing import Iterable, Iterator
+
+
+def batched(
+    chunks: Iterable[str],
+    min_batch_size: int = 1,
+    max_batch_size: int = 32,
+    growth_factor: float = 2.0,
+    max_ms: float = 50.0
+) -> Iterator[str]:
+    """Join streamed text chunks into batches.
+
+    The first batch is flushed after min_batch_size chunks so the first
+    token shows up immediately. Each following batch may hold growth_factor
+    times more chunks, up to max_batch_size. A batch is also flushed once it
+    is older than max_ms milliseconds, so slow streams still print smoothly.
+
+    Args:
+        chunks: The streamed text chunks
+        min_batch_size: Number of chunks in the first batch
+        max_batch_size: Maximum number of chunks in one batch
+        growth_factor: Factor the batch size grows by after each flush
+        max_ms: Maximum age of a batch in milliseconds before it is flushed
+
+    Yields:
+        The joined text of each batch
+    """
+    batch_size = float(min_batch_size)
+    max_age = max_ms / 1000.0
+    parts = []
+    started = 0.0
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if not parts:
+            started = time.monotonic()
+        parts.append(chunk)
+
+        if len(parts) >= batch_size or time.monotonic() - started >= max_age:
+            yield "".join(parts)
+            parts.clear()
+            batch_size = min(batch_size * growth_factor, max_batch_size)
+
+    if parts:
+        yield "".join(parts)
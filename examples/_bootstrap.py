@@ -0,0 +1,9 @@
+"""Make the repository root importable for examples run from a source checkout."""
+
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
@@ -1,59 +1,72 @@
-"""Simple example of using the QV Ollama SDK."""
+"""Simple example of using the QV Ollama SDK.
 
-import sys
-import os
+Independent questions are sent concurrently with asyncio.gather. How many
+requests the Ollama server actually runs in parallel is controlled on the
+server side:
 
-# Add the parent directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    OLLAMA_NUM_PARALLEL       Parallel requests per loaded model
+    OLLAMA_MAX_LOADED_MODELS  Number of models kept loaded at the same time
+"""
 
-from src.qv_ollama_sdk.domain.models import (
-    Conversation,
-    ModelParameters
-)
-from src.qv_ollama_sdk.services.ollama_conversation_service import OllamaConversationService
+import asyncio
 
+import _bootstrap  # noqa: F401  (makes src importable)
+
+
+def create_conversation(question: str):
+    """Create a conversation with a system message and a first question."""
+    from src.qv_ollama_sdk.domain.models import Conversation
 
-def main():
-    # Create a new conversation
     conversation = Conversation(model_name="gemma2:2b")
-    
-    # Add a system message to set the context
-    conversation.add_system_message(
-        "You are a helpful AI assistant. Answer questions concisely and accurately."
-    )
-    
-    # Add a user message
-    conversation.add_user_message("What is the capital of France?")
-    
+
+    # Add a system message to set the context and the user message
+    conversation.extend_messages([
+        {"role": "system", "content": "You are a helpful AI assistant. Answer questions concisely and accurately."},
+        {"role": "user", "content": question}
+    ])
+    return conversation
+
+
+async def main():
+    # Import the SDK only once the example actually runs
+    from src.qv_ollama_sdk.domain.models import ModelParameters
+    from src.qv_ollama_sdk.services.ollama_conversation_service import OllamaConversationService
+
+    # Create two independent conversations
+    france = create_conversation("What is the capital of France?")
+    germany = create_conversation("What is the capital of Germany?")
+
     # Create the Ollama conversation service
     service = OllamaConversationService()
-    
+
     # Set custom parameters
     parameters = ModelParameters(
         temperature=0.7,
         max_tokens=500
     )
-    
-    # Generate a response
-    print("Generating response...")
-    response = service.generate_response(conversation, parameters)
-    
-    # Print the response
-    print(f"\nResponse: {response.content}")
-    
-    # Add the response to the conversation
-    conversation.add_assistant_message(response.content)
-    
-    # Continue the conversation
-    conversation.add_user_message("And what is the population of Paris?")
-    
+
+    # Generate both responses concurrently
+    print("Generating responses...")
+    responses = await asyncio.gather(
+        service.agenerate_response(france, parameters),
+        service.agenerate_response(germany, parameters)
+    )
+
+    # Print the responses and add them to their conversations
+    for conversation, response in zip((france, germany), responses):
+        print(f"\nResponse: {response.content}")
+        conversation.add_assistant_message(response.content)
+
+    # Continue the first conversation
+    france.add_user_message("And what is the population of Paris?")
+
     # Generate another response
     print("\nGenerating response...")
-    response = service.generate_response(conversation, parameters)
-    
+    response = await service.agenerate_response(france, parameters)
+
     # Print the response
     print(f"\nResponse: {response.content}")
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main())
@@ -1,6 +1,46 @@
-"""Simple Example: Clean API with Thinking + Tool Calling"""
+"""Simple Example: Clean API with Thinking + Tool Calling
 
-from qv_ollama_sdk import OllamaChatClient
+Server-side parallelism is controlled by environment variables of the
+Ollama server:
+
+    OLLAMA_NUM_PARALLEL       Parallel requests per loaded model
+    OLLAMA_MAX_LOADED_MODELS  Number of models kept loaded at the same time
+"""
+
+import asyncio
+import sys
+
+# Printed at the end of main() with a single write
+SUMMARY = """
+
+🎯 Clean API Summary
+=========================
+✅ Just TWO main methods:
+  • chat() - Get full response
+  • stream_chat() - Stream response chunks
+
+🎛️ Parameters:
+  • tools=None - Add tool functions
+  • auto_execute=True - Auto-run tools (default)
+  • auto_execute=False - Raw tool calls only
+
+🧠 Thinking Control:
+  • enable_thinking() - Global thinking on
+  • disable_thinking() - Global thinking off
+
+📄 Consistent Response:
+  • response.content - The answer
+  • response.thinking - AI's thought process
+  • response.tool_calls - Tools that were called
+  • response.tool_results - Tool execution results
+
+💡 Use Cases:
+  • Simple questions: chat('Question?')
+  • With tools: chat('Calculate...', tools=tools)
+  • Thinking mode: enable_thinking() → chat()
+  • Streaming: stream_chat() for real-time
+  • Raw tools: chat(..., auto_execute=False)
+"""
 
 # Simple tool functions
 def add_numbers(a: str, b: str) -> str:
@@ -11,7 +51,76 @@ def get_weather(city: str) -> str:
     """Get weather for a city (simulated)."""
     return f"The weather in {city} is sunny and 23°C"
 
+async def stream_with_pipeline(client, message, tools):
+    """Stream a response through a reader -> formatter -> renderer pipeline.
+    
+    The stages are connected by queues, so a slow terminal never stalls
+    reading from the network and vice versa.
+    
+    Returns:
+        The number of content chunks and the number of tool calls
+    """
+    raw_chunks = asyncio.Queue(maxsize=64)
+    render_queue = asyncio.Queue(maxsize=64)
+    stats = {"content_chunks": 0, "tool_calls": 0}
+    
+    async def read():
+        # Stage 1: Read chunks from the stream (tools are executed by the SDK)
+        async for chunk in client.astream_chat(message, tools=tools):
+            await raw_chunks.put(chunk)
+        await raw_chunks.put(None)
+    
+    async def format_chunks():
+        # Stage 2: Turn chunks into display text
+        thinking_displayed = False
+        content_started = False
+        while (chunk := await raw_chunks.get()) is not None:
+            # Handle thinking - clean one-time display
+            if chunk.thinking:
+                if not thinking_displayed:
+                    await render_queue.put("🧠 Thinking: ")
+                    thinking_displayed = True
+                await render_queue.put(chunk.thinking)
+            
+            # Handle tool calls
+            if chunk.tool_calls:
+                stats["tool_calls"] += len(chunk.tool_calls)
+                if thinking_displayed and not content_started:
+                    await render_queue.put("\n")  # Newline after thinking
+                tool_call = chunk.tool_calls[0]
+                await render_queue.put(f"🛠️ Tool called: {tool_call.function.name}({tool_call.function.arguments})\n")
+            
+            # Handle content - clean display
+            if chunk.content:
+                if not content_started:
+                    if thinking_displayed:
+                        await render_queue.put("\n")  # Newline after thinking
+                    await render_queue.put("💬 Answer: ")
+                    content_started = True
+                stats["content_chunks"] += 1
+                await render_queue.put(chunk.content)
+        await render_queue.put(None)
+    
+    async def render():
+        # Stage 3: Write everything that is queued in one go
+        done = False
+        while not done:
+            parts = [await render_queue.get()]
+            while not render_queue.empty():
+                parts.append(render_queue.get_nowait())
+            if parts[-1] is None:
+                parts.pop()
+                done = True
+            sys.stdout.write("".join(parts))
+            sys.stdout.flush()
+    
+    await asyncio.gather(read(), format_chunks(), render())
+    return stats["content_chunks"], stats["tool_calls"]
+
 def main():
+    # Import the SDK only once the example actually runs
+    from qv_ollama_sdk import OllamaChatClient
+    
     print("🚀 Clean API Example - Thinking + Tools")
     print("=" * 45)
     
@@ -62,42 +171,14 @@ def main():
     print("Streaming response:")
     print()
     
-    thinking_displayed = False
-    content_started = False
-    content_chunks = 0
-    tool_calls_made = []
-    
-    for chunk in client.stream_chat("Add 12 + 8, then tell me weather in Stuttgart", tools=tools):
-        # Handle thinking - clean one-time display
-        if chunk.thinking and not thinking_displayed:
-            print("🧠 Thinking: ", end="", flush=True)
-            thinking_displayed = True
-        
-        if chunk.thinking:
-            print(chunk.thinking, end="", flush=True)
-        
-        # Handle tool calls
-        if chunk.tool_calls:
-            tool_calls_made.extend(chunk.tool_calls)
-            if thinking_displayed and not content_started:
-                print()  # Newline after thinking
-            print(f"🛠️ Tool called: {chunk.tool_calls[0].function.name}({chunk.tool_calls[0].function.arguments})")
-        
-        # Handle content - clean display
-        if chunk.content:
-            if not content_started:
-                if thinking_displayed:
-                    print()  # Newline after thinking
-                print("💬 Answer: ", end="", flush=True)
-                content_started = True
-            
-            content_chunks += 1
-            print(chunk.content, end="", flush=True)
+    content_chunks, tool_call_count = asyncio.run(
+        stream_with_pipeline(client, "Add 12 + 8, then tell me weather in Stuttgart", tools)
+    )
     
     print()  # Final newline
     print(f"\n📊 Summary:")
     print(f"   Content chunks: {content_chunks}")
-    print(f"   Tool calls: {len(tool_calls_made)}")
+    print(f"   Tool calls: {tool_call_count}")
     print("   💡 Thinking streamed in readable blocks!")
     
     # ===== EXAMPLE 5: Raw Tool Calls (No Auto-Execute) =====
@@ -125,33 +206,7 @@ def main():
     print("💡 Back to fast mode!")
     
     # ===== SUMMARY =====
-    print("\n\n🎯 Clean API Summary")
-    print("=" * 25)
-    print("✅ Just TWO main methods:")
-    print("  • chat() - Get full response")
-    print("  • stream_chat() - Stream response chunks")
-    
-    print("\n🎛️ Parameters:")
-    print("  • tools=None - Add tool functions")
-    print("  • auto_execute=True - Auto-run tools (default)")
-    print("  • auto_execute=False - Raw tool calls only")
-    
-    print("\n🧠 Thinking Control:")
-    print("  • enable_thinking() - Global thinking on")
-    print("  • disable_thinking() - Global thinking off")
-    
-    print("\n📄 Consistent Response:")
-    print("  • response.content - The answer")
-    print("  • response.thinking - AI's thought process")
-    print("  • response.tool_calls - Tools that were called")
-    print("  • response.tool_results - Tool execution results")
-    
-    print("\n💡 Use Cases:")
-    print("  • Simple questions: chat('Question?')")
-    print("  • With tools: chat('Calculate...', tools=tools)")
-    print("  • Thinking mode: enable_thinking() → chat()")
-    print("  • Streaming: stream_chat() for real-time")
-    print("  • Raw tools: chat(..., auto_execute=False)")
+    sys.stdout.write(SUMMARY)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
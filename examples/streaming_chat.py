@@ -1,30 +1,32 @@
-"""Example of using the QV Ollama SDK with streaming responses."""
+"""Example of using the QV Ollama SDK with streaming responses.
 
-import sys
-import os
+Server-side parallelism is controlled by environment variables of the
+Ollama server:
+
+    OLLAMA_NUM_PARALLEL       Parallel requests per loaded model
+    OLLAMA_MAX_LOADED_MODELS  Number of models kept loaded at the same time
+"""
 
-# Add the parent directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import sys
 
-from src.qv_ollama_sdk.domain.models import (
-    Conversation,
-    ModelParameters
-)
-from src.qv_ollama_sdk.services.ollama_conversation_service import OllamaConversationService
+import _bootstrap  # noqa: F401  (makes src importable)
+from _batching import batched
 
 
 def streaming_example():
     """Example of using the streaming API."""
+    # Import the SDK only once the example actually runs
+    from src.qv_ollama_sdk.domain.models import Conversation, ModelParameters
+    from src.qv_ollama_sdk.services.ollama_conversation_service import OllamaConversationService
+    
     # Create a new conversation
     conversation = Conversation(model_name="gemma2:2b")
     
-    # Add a system message to set the context
-    conversation.add_system_message(
-        "You are a helpful AI assistant. Answer questions concisely and accurately."
-    )
-    
-    # Add a user message
-    conversation.add_user_message("Explain quantum computing in simple terms.")
+    # Add a system message to set the context and the user message
+    conversation.extend_messages([
+        {"role": "system", "content": "You are a helpful AI assistant. Answer questions concisely and accurately."},
+        {"role": "user", "content": "Explain quantum computing in simple terms."}
+    ])
     
     # Create the Ollama conversation service
     service = OllamaConversationService()
@@ -39,17 +41,19 @@ def streaming_example():
     print("Generating streaming response...\n")
     
     # Collect the full response to add to conversation history
-    full_response = ""
+    response_parts = []
     
-    # Stream the response
-    for chunk in service.stream_response(conversation, parameters):
-        full_response += chunk
-        print(chunk, end="", flush=True)
+    # Stream the response, writing batches of chunks instead of every token
+    stream = (chunk.content for chunk in service.stream_response(conversation, parameters))
+    for text in batched(stream):
+        response_parts.append(text)
+        sys.stdout.write(text)
+        sys.stdout.flush()
     
     print("\n\nStreaming complete!")
     
     # Add the response to the conversation
-    conversation.add_assistant_message(full_response)
+    conversation.add_assistant_message("".join(response_parts))
 
 
 if __name__ == "__main__":
@@ -1,6 +1,36 @@
 """Example demonstrating automatic tool execution with Thinking Mode integration."""
 
-from qv_ollama_sdk import OllamaChatClient, ModelParameters
+import sys
+
+# Printed at the end of main() with a single write
+SUMMARY = """
+
+🎉 FINAL SUMMARY: Tool + Thinking Integration
+=======================================================
+✅ Successfully Demonstrated:
+  🧠 Thinking Mode + Tool Selection Reasoning
+  🛠️ Automatic Tool Execution with Thought Process
+  📡 Streaming with Real-time Thinking + Tool Calls
+  ⚖️ Quality Comparison: Thinking vs Non-Thinking
+  🎯 Advanced Scenarios: Error Handling, Tool Chains
+  🔍 Complete Response Analysis with Full Details
+  📚 Conversation History with Tool + Thinking Messages
+
+🚀 QV Ollama SDK Features Showcased:
+  - chat_with_thinking() + tools: One-shot thinking with tools
+  - chat_with_auto_tools(): Classic automatic tool execution
+  - chat_with_auto_tools_full(): Full response + tool details
+  - stream_chat_with_tools(): Streaming with thinking capture
+  - enable_thinking() / disable_thinking(): Dynamic control
+  - Complete tool calling pipeline with thinking transparency
+
+🎯 Perfect for:
+  - Debugging tool selection logic
+  - Understanding AI reasoning process
+  - Quality assurance for critical calculations
+  - Educational AI applications
+  - Transparent AI systems
+"""
 
 def add_two_numbers(a: str, b: str) -> str:
     """Add two numbers and return the result."""
@@ -30,6 +60,9 @@ def calculate_area(shape: str, width: str, height: str = None) -> str:
         return "Unsupported shape or missing parameters"
 
 def main():
+    # Import the SDK only once the example actually runs
+    from qv_ollama_sdk import OllamaChatClient
+    
     print("🧠🛠️ Tool Execution + Thinking Mode Example - QV Ollama SDK")
     print("=" * 65)
     
@@ -142,21 +175,24 @@ def main():
     print("Question: Calculate the area of a circle with radius 4")
     print("Streaming response:")
     
-    full_thinking = ""
-    full_content = ""
+    thinking_parts = []
+    content_parts = []
     tool_calls_seen = []
     
     for chunk in client.stream_chat_with_tools("Calculate the area of a circle with radius 4", tools=tools):
         if chunk.thinking:
-            full_thinking += chunk.thinking
+            thinking_parts.append(chunk.thinking)
             print(f"🧠 Thinking chunk: {chunk.thinking[:100]}{'...' if len(chunk.thinking) > 100 else ''}")
         if chunk.content:
-            full_content += chunk.content
+            content_parts.append(chunk.content)
             print(f"💬 Content: '{chunk.content}'", end="", flush=True)
         if chunk.tool_calls:
             tool_calls_seen.extend(chunk.tool_calls)
             print(f"\n🛠️ Tool call: {chunk.tool_calls[0].function.name}({chunk.tool_calls[0].function.arguments})")
     
+    full_thinking = "".join(thinking_parts)
+    full_content = "".join(content_parts)
+    
     print(f"\n📊 Summary:")
     print(f"   Thinking captured: {len(full_thinking)} characters")
     print(f"   Content captured: {len(full_content)} characters") 
@@ -262,32 +298,7 @@ def main():
     print(f"  Messages with thinking: {thinking_messages}")
     
     # ===== FINAL SUMMARY =====
-    print("\n\n🎉 FINAL SUMMARY: Tool + Thinking Integration")
-    print("=" * 55)
-    
-    print("✅ Successfully Demonstrated:")
-    print("  🧠 Thinking Mode + Tool Selection Reasoning")
-    print("  🛠️ Automatic Tool Execution with Thought Process")
-    print("  📡 Streaming with Real-time Thinking + Tool Calls")
-    print("  ⚖️ Quality Comparison: Thinking vs Non-Thinking")
-    print("  🎯 Advanced Scenarios: Error Handling, Tool Chains")
-    print("  🔍 Complete Response Analysis with Full Details")
-    print("  📚 Conversation History with Tool + Thinking Messages")
-    
-    print("\n🚀 QV Ollama SDK Features Showcased:")
-    print("  - chat_with_thinking() + tools: One-shot thinking with tools")
-    print("  - chat_with_auto_tools(): Classic automatic tool execution")
-    print("  - chat_with_auto_tools_full(): Full response + tool details")
-    print("  - stream_chat_with_tools(): Streaming with thinking capture")
-    print("  - enable_thinking() / disable_thinking(): Dynamic control")
-    print("  - Complete tool calling pipeline with thinking transparency")
-    
-    print("\n🎯 Perfect for:")
-    print("  - Debugging tool selection logic")
-    print("  - Understanding AI reasoning process")  
-    print("  - Quality assurance for critical calculations")
-    print("  - Educational AI applications")
-    print("  - Transparent AI systems")
+    sys.stdout.write(SUMMARY)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
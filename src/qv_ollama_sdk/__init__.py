@@ -14,8 +14,34 @@ from .domain.models import (
     ToolRegistry
 )
 
-from .services.ollama_conversation_service import OllamaConversationService
-from .client import OllamaChatClient
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .services.ollama_conversation_service import OllamaConversationService
+    from .client import OllamaChatClient
+
+# The service and the client import ollama (and with it httpx and pydantic),
+# so they are only imported on first access (PEP 562)
+_LAZY_IMPORTS = {
+    "OllamaConversationService": ".services.ollama_conversation_service",
+    "OllamaChatClient": ".client",
+}
+
+
+def __getattr__(name):
+    """Import the service and the client on first access."""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    import importlib
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
 
 __all__ = [
     # Domain models
@@ -1,6 +1,8 @@
 """High-level client for the QV Ollama SDK."""
 
-from typing import Optional, Dict, Any, List, Iterator, Callable
+import asyncio
+import time
+from typing import Optional, Dict, Any, List, Iterator, AsyncIterator, Callable, Union
 
 from .domain.models import (
     Conversation,
@@ -17,11 +19,20 @@ from .services.ollama_conversation_service import OllamaConversationService
 class OllamaChatClient:
     """A simplified client for chat interactions with Ollama models."""
     
+    # Maximum number of characters joined into one chunk when stream_batch_ms is set
+    STREAM_BATCH_CHARS = 128
+    
     def __init__(
         self,
         model_name: str = "gemma2:2b",
         system_message: Optional[str] = None,
-        parameters: Optional[ModelParameters] = None
+        parameters: Optional[ModelParameters] = None,
+        keep_alive: Optional[Union[str, float]] = None,
+        warmup: bool = False,
+        cache_responses: bool = False,
+        compact_history: bool = False,
+        stream_batch_ms: float = 0,
+        max_messages: Optional[int] = None
     ):
         """Initialize the Ollama chat client.
         
@@ -29,15 +40,39 @@ class OllamaChatClient:
             model_name: The name of the model to use
             system_message: Optional system message to set the context
             parameters: Optional model parameters to use for generation
+            keep_alive: Optional time the model stays loaded between requests
+                (e.g. "30m"), so the server can reuse the cached conversation prefix
+            warmup: Whether to process the system message on the server right
+                away (see pin_system_prompt), so the first question is answered faster
+            cache_responses: Whether chat() and achat() answer a repeated question
+                from the service's in-memory response cache instead of asking the
+                model again. Only used without tools and when temperature=0 or a
+                seed is set, since other responses are not reproducible
+            compact_history: Whether earlier turns are sent to the model as one
+                compact message (see Conversation.compact) when no tools are used
+            stream_batch_ms: If greater than 0, stream_chat() and astream_chat()
+                join content and thinking chunks that arrive within this many
+                milliseconds into one chunk. Chunks with tool calls or tool
+                results are never joined
+            max_messages: Optional maximum number of messages kept in the
+                history; older turns are dropped, the system message is kept
         """
-        self.conversation = Conversation(model_name=model_name)
-        self.service = OllamaConversationService()
+        self.conversation = Conversation(model_name=model_name, max_messages=max_messages)
+        self.service = OllamaConversationService(cache_responses=cache_responses)
         self.parameters = parameters or ModelParameters()
         self.tool_registry = ToolRegistry()  # Client's own tool registry
+        self.compact_history = compact_history
+        self.stream_batch_ms = stream_batch_ms
+        
+        if keep_alive is not None:
+            self.keep_alive = keep_alive
         
         # Add system message if provided
         if system_message:
             self.conversation.add_system_message(system_message)
+            
+            if warmup:
+                self.pin_system_prompt()
     
     def chat(self, message: str, tools: Optional[List[Callable]] = None, auto_execute: bool = True, images: Optional[List] = None) -> GenerationResponse:
         """Send a message and get a response.
@@ -59,27 +94,76 @@ class OllamaChatClient:
                 self.conversation, self.parameters, tools, auto_execute=True, tool_registry=self.tool_registry
             )
         
+            # Add the assistant's response and the tool results to the conversation
+            self._commit_response(response.content, response.tool_calls, response.tool_results)
+            return response
+        else:
+            # Generate a response without automatic tool execution
+            # (repeated questions are answered from the service's response cache)
+            response = self.service.generate_response(self._request_conversation(tools), self.parameters, tools)
+            
             # Add the assistant's response to the conversation (including tool calls)
-            assistant_message = self.conversation.add_assistant_message(response.content)
-            if response.tool_calls:
-                assistant_message.tool_calls = response.tool_calls
+            self._commit_response(response.content, response.tool_calls)
+            return response
+    
+    async def achat(self, message: str, tools: Optional[List[Callable]] = None, auto_execute: bool = True, images: Optional[List] = None) -> GenerationResponse:
+        """Asynchronously send a message and get a response.
+        
+        Args:
+            message: The user message to send
+            tools: Optional list of Python functions that can be called by the model
+            auto_execute: Whether to automatically execute tool calls (default: True)
             
-            # Add tool result messages if any
-            if response.tool_results:
-                self.conversation.add_tool_results(response.tool_results)
-                
+        Returns:
+            A GenerationResponse containing content, thinking, tool calls, and results
+        """
+        # Add the user message (with optional images)
+        self.conversation.add_user_message(message, images=images)
+        
+        if tools and auto_execute:
+            # Generate response with automatic tool execution
+            response = await self.service.agenerate_response_with_tool_execution(
+                self.conversation, self.parameters, tools, auto_execute=True, tool_registry=self.tool_registry
+            )
+        
+            # Add the assistant's response and the tool results to the conversation
+            self._commit_response(response.content, response.tool_calls, response.tool_results)
             return response
         else:
             # Generate a response without automatic tool execution
-            response = self.service.generate_response(self.conversation, self.parameters, tools)
+            # (repeated questions are answered from the service's response cache)
+            response = await self.service.agenerate_response(self._request_conversation(tools), self.parameters, tools)
             
             # Add the assistant's response to the conversation (including tool calls)
-            assistant_message = self.conversation.add_assistant_message(response.content)
-            if response.tool_calls:
-                assistant_message.tool_calls = response.tool_calls
-            
+            self._commit_response(response.content, response.tool_calls)
             return response
     
+    async def gather_chat(self, messages: List[str], tools: Optional[List[Callable]] = None) -> List[GenerationResponse]:
+        """Ask several independent questions concurrently.
+        
+        Each message is sent on top of the current conversation history in its
+        own copy of the conversation; the history itself is not changed. The
+        Ollama server processes up to OLLAMA_NUM_PARALLEL requests per model
+        at the same time.
+        
+        Args:
+            messages: The user messages to send
+            tools: Optional list of Python functions that can be called by the model
+            
+        Returns:
+            One GenerationResponse per message, in the order of the messages
+        """
+        async def ask(message: str) -> GenerationResponse:
+            conversation = self.conversation.fork()
+            conversation.add_user_message(message)
+            if tools:
+                return await self.service.agenerate_response_with_tool_execution(
+                    conversation, self.parameters, tools, auto_execute=True, tool_registry=self.tool_registry
+                )
+            return await self.service.agenerate_response(conversation, self.parameters)
+        
+        return list(await asyncio.gather(*(ask(message) for message in messages)))
+    
     def stream_chat(self, message: str, tools: Optional[List[Callable]] = None, auto_execute: bool = True, images: Optional[List] = None) -> Iterator[GenerationResponse]:
         """Send a message and stream the response.
         
@@ -96,53 +180,49 @@ class OllamaChatClient:
         
         if tools and auto_execute:
             # Collect responses for conversation history
-            initial_content = ""
-            final_content = ""
+            initial_parts = []
+            final_parts = []
             all_tool_calls = []
             all_tool_results = []
             
             # Stream with automatic tool execution
-            for chunk in self.service.stream_response_with_tool_execution(
+            for chunk in self._batch_stream(self.service.stream_response_with_tool_execution(
                 self.conversation, self.parameters, tools, auto_execute=True, tool_registry=self.tool_registry
-            ):
+            )):
+                kind = chunk.kind
+                
                 # Handle tool execution results
-                if chunk.tool_results:
+                if kind & GenerationResponse.TOOL_RESULTS:
                     all_tool_results.extend(chunk.tool_results)
                 
-                # Handle content chunks
-                if chunk.content:
-                    if chunk.tool_calls or all_tool_calls:
-                        initial_content += chunk.content
+                # Content after the tool results is the final answer
+                if kind & GenerationResponse.CONTENT:
+                    if all_tool_results:
+                        final_parts.append(chunk.content)
                     else:
-                        final_content += chunk.content
+                        initial_parts.append(chunk.content)
                 
                 # Collect tool calls
-                if chunk.tool_calls:
+                if kind & GenerationResponse.TOOL_CALLS:
                     all_tool_calls.extend(chunk.tool_calls)
                 
                 yield chunk
             
             # Add messages to conversation history
-            if initial_content or all_tool_calls:
-                assistant_message = self.conversation.add_assistant_message(initial_content)
-                if all_tool_calls:
-                    assistant_message.tool_calls = all_tool_calls
-            
-            if all_tool_results:
-                self.conversation.add_tool_results(all_tool_results)
-            
-            # If we have a final response, add it too
-            if final_content:
-                self.conversation.add_assistant_message(final_content)
+            self._commit_response(
+                "".join(initial_parts), all_tool_calls, all_tool_results, "".join(final_parts)
+            )
         else:
             # Collect the full response and tool calls for conversation history
-            full_response = ""
+            response_parts = []
             all_tool_calls = []
         
             # Stream the response without automatic tool execution
-            for chunk in self.service.stream_response(self.conversation, self.parameters, tools):
+            for chunk in self._batch_stream(
+                self.service.stream_response(self._request_conversation(tools), self.parameters, tools)
+            ):
                 if chunk.content:
-                    full_response += chunk.content
+                    response_parts.append(chunk.content)
                 
                 # Collect tool calls from chunks
                 if chunk.tool_calls:
@@ -150,9 +230,201 @@ class OllamaChatClient:
                 yield chunk
         
             # Add the assistant's response to the conversation (including tool calls)
-            assistant_message = self.conversation.add_assistant_message(full_response)
-            if all_tool_calls:
-                assistant_message.tool_calls = all_tool_calls
+            self._commit_response("".join(response_parts), all_tool_calls)
+    
+    async def astream_chat(self, message: str, tools: Optional[List[Callable]] = None, auto_execute: bool = True, images: Optional[List] = None) -> AsyncIterator[GenerationResponse]:
+        """Send a message and asynchronously stream the response.
+        
+        Args:
+            message: The user message to send
+            tools: Optional list of Python functions that can be called by the model
+            auto_execute: Whether to automatically execute tool calls (default: True)
+        
+        Yields:
+            GenerationResponse chunks as they become available, including content, thinking, and tool calls
+        """
+        # Add the user message (with optional images)
+        self.conversation.add_user_message(message, images=images)
+        
+        if tools and auto_execute:
+            # Collect responses for conversation history
+            initial_parts = []
+            final_parts = []
+            all_tool_calls = []
+            all_tool_results = []
+            
+            # Stream with automatic tool execution
+            async for chunk in self._abatch_stream(self.service.astream_response_with_tool_execution(
+                self.conversation, self.parameters, tools, auto_execute=True, tool_registry=self.tool_registry
+            )):
+                kind = chunk.kind
+                
+                # Handle tool execution results
+                if kind & GenerationResponse.TOOL_RESULTS:
+                    all_tool_results.extend(chunk.tool_results)
+                
+                # Content after the tool results is the final answer
+                if kind & GenerationResponse.CONTENT:
+                    if all_tool_results:
+                        final_parts.append(chunk.content)
+                    else:
+                        initial_parts.append(chunk.content)
+                
+                # Collect tool calls
+                if kind & GenerationResponse.TOOL_CALLS:
+                    all_tool_calls.extend(chunk.tool_calls)
+                
+                yield chunk
+            
+            # Add messages to conversation history
+            self._commit_response(
+                "".join(initial_parts), all_tool_calls, all_tool_results, "".join(final_parts)
+            )
+        else:
+            # Collect the full response and tool calls for conversation history
+            response_parts = []
+            all_tool_calls = []
+            
+            # Stream the response without automatic tool execution
+            async for chunk in self._abatch_stream(
+                self.service.astream_response(self._request_conversation(tools), self.parameters, tools)
+            ):
+                if chunk.content:
+                    response_parts.append(chunk.content)
+                
+                # Collect tool calls from chunks
+                if chunk.tool_calls:
+                    all_tool_calls.extend(chunk.tool_calls)
+                yield chunk
+            
+            # Add the assistant's response to the conversation (including tool calls)
+            self._commit_response("".join(response_parts), all_tool_calls)
+    
+    def _commit_response(
+        self,
+        content: str,
+        tool_calls: Optional[List[ToolCall]] = None,
+        tool_results: Optional[List[ToolResult]] = None,
+        final_content: str = ""
+    ) -> None:
+        """Add a response of the model to the conversation history.
+        
+        Args:
+            content: The assistant's answer, or its text before the tool calls
+            tool_calls: Tool calls made by the assistant
+            tool_results: Results of the executed tool calls
+            final_content: The assistant's answer after the tool results, if streamed separately
+        """
+        assistant_message = self.conversation.add_assistant_message(content)
+        if tool_calls:
+            assistant_message.tool_calls = tool_calls
+        if tool_results:
+            self.conversation.add_tool_results(tool_results)
+        if final_content:
+            self.conversation.add_assistant_message(final_content)
+    
+    def _batch_stream(self, chunks: Iterator[GenerationResponse]) -> Iterator[GenerationResponse]:
+        """Join content and thinking chunks that arrive within stream_batch_ms.
+        
+        Args:
+            chunks: The chunks streamed by the service
+            
+        Yields:
+            The chunks, with consecutive content-only or thinking-only chunks joined
+        """
+        if self.stream_batch_ms <= 0:
+            yield from chunks
+            return
+        
+        pending = []
+        pending_chars = 0
+        deadline = 0.0
+        for chunk in chunks:
+            if pending and (chunk.kind != pending[0].kind or time.monotonic() >= deadline):
+                yield self._join_chunks(pending)
+                pending = []
+                pending_chars = 0
+            
+            if chunk.kind != GenerationResponse.CONTENT and chunk.kind != GenerationResponse.THINKING:
+                yield chunk
+                continue
+            
+            if not pending:
+                deadline = time.monotonic() + self.stream_batch_ms / 1000.0
+            pending.append(chunk)
+            pending_chars += len(chunk.content or chunk.thinking)
+            if pending_chars >= self.STREAM_BATCH_CHARS:
+                yield self._join_chunks(pending)
+                pending = []
+                pending_chars = 0
+        
+        if pending:
+            yield self._join_chunks(pending)
+    
+    async def _abatch_stream(self, chunks: AsyncIterator[GenerationResponse]) -> AsyncIterator[GenerationResponse]:
+        """Async variant of _batch_stream."""
+        if self.stream_batch_ms <= 0:
+            async for chunk in chunks:
+                yield chunk
+            return
+        
+        pending = []
+        pending_chars = 0
+        deadline = 0.0
+        async for chunk in chunks:
+            if pending and (chunk.kind != pending[0].kind or time.monotonic() >= deadline):
+                yield self._join_chunks(pending)
+                pending = []
+                pending_chars = 0
+            
+            if chunk.kind != GenerationResponse.CONTENT and chunk.kind != GenerationResponse.THINKING:
+                yield chunk
+                continue
+            
+            if not pending:
+                deadline = time.monotonic() + self.stream_batch_ms / 1000.0
+            pending.append(chunk)
+            pending_chars += len(chunk.content or chunk.thinking)
+            if pending_chars >= self.STREAM_BATCH_CHARS:
+                yield self._join_chunks(pending)
+                pending = []
+                pending_chars = 0
+        
+        if pending:
+            yield self._join_chunks(pending)
+    
+    @staticmethod
+    def _join_chunks(chunks: List[GenerationResponse]) -> GenerationResponse:
+        """Join chunks of the same kind into one chunk."""
+        if len(chunks) == 1:
+            return chunks[0]
+        last = chunks[-1]
+        if last.kind == GenerationResponse.THINKING:
+            return GenerationResponse(
+                model_name=last.model_name,
+                content="",
+                thinking="".join(c.thinking for c in chunks),
+                raw_response=last.raw_response,
+                finish_reason=last.finish_reason,
+                usage=last.usage
+            )
+        return GenerationResponse(
+            model_name=last.model_name,
+            content="".join(c.content for c in chunks),
+            raw_response=last.raw_response,
+            finish_reason=last.finish_reason,
+            usage=last.usage
+        )
+    
+    def _request_conversation(self, tools: Optional[List[Callable]] = None) -> Conversation:
+        """Get the conversation to send to the model for the next request."""
+        if self.compact_history and not tools:
+            return self.conversation.compact()
+        return self.conversation
+    
+    def clear_cache(self) -> None:
+        """Clear the response cache."""
+        self.service.clear_cache()
     
     def get_history(self) -> List[Dict[str, str]]:
         """Get the conversation history.
@@ -172,14 +444,8 @@ class OllamaChatClient:
         Args:
             message: The system message to set
         """
-        # Clear existing system messages
-        self.conversation.messages = [
-            msg for msg in self.conversation.messages 
-            if msg.role != MessageRole.SYSTEM
-        ]
-        
-        # Add the new system message
-        self.conversation.add_system_message(message)
+        # Replace the system message in place, keeping the message order
+        self.conversation.set_system_message(message)
     
     def set_parameters(self, **kwargs) -> None:
         """Update model parameters.
@@ -196,10 +462,7 @@ class OllamaChatClient:
     @property
     def temperature(self) -> float:
         """Get the current temperature parameter if set."""
-        try:
-            return self.parameters.temperature
-        except AttributeError:
-            return None
+        return self.parameters.temperature
         
     @temperature.setter
     def temperature(self, value: float) -> None:
@@ -209,10 +472,7 @@ class OllamaChatClient:
     @property
     def max_tokens(self) -> int:
         """Get the current max_tokens parameter if set."""
-        try:
-            return self.parameters.max_tokens
-        except AttributeError:
-            return None
+        return self.parameters.max_tokens
         
     @max_tokens.setter
     def max_tokens(self, value: int) -> None:
@@ -222,10 +482,7 @@ class OllamaChatClient:
     @property
     def top_p(self) -> float:
         """Get the current top_p parameter if set."""
-        try:
-            return self.parameters.top_p
-        except AttributeError:
-            return None
+        return self.parameters.top_p
         
     @top_p.setter
     def top_p(self, value: float) -> None:
@@ -235,10 +492,7 @@ class OllamaChatClient:
     @property
     def num_ctx(self) -> int:
         """Get the current context window size if set."""
-        try:
-            return self.parameters.num_ctx
-        except AttributeError:
-            return None
+        return self.parameters.num_ctx
         
     @num_ctx.setter
     def num_ctx(self, value: int) -> None:
@@ -248,16 +502,24 @@ class OllamaChatClient:
     @property
     def thinking_mode(self) -> bool:
         """Get the current thinking mode setting."""
-        try:
-            return self.parameters.think
-        except AttributeError:
-            return False
+        think = self.parameters.think
+        return False if think is None else think
         
     @thinking_mode.setter
     def thinking_mode(self, value: bool) -> None:
         """Enable or disable thinking mode."""
         self.set_parameters(think=value)
     
+    @property
+    def keep_alive(self) -> Optional[Union[str, float]]:
+        """Get how long the model stays loaded between requests, if set."""
+        return self.parameters.keep_alive
+        
+    @keep_alive.setter
+    def keep_alive(self, value: Union[str, float]) -> None:
+        """Set how long the model stays loaded between requests."""
+        self.set_parameters(keep_alive=value)
+    
     def enable_thinking(self) -> None:
         """Enable thinking mode for supported models."""
         self.thinking_mode = True
@@ -266,6 +528,31 @@ class OllamaChatClient:
         """Disable thinking mode."""
         self.thinking_mode = False
     
+    def pin_system_prompt(self) -> None:
+        """Load the model and let the server process the system prompt ahead of time.
+        
+        Sends only the system message with a single-token generation, so the
+        server already holds the system prompt in its cache when the first
+        user message arrives. Use together with keep_alive so the model is not
+        unloaded in between.
+        """
+        system_messages = [
+            msg for msg in self.conversation.messages
+            if msg.role == MessageRole.SYSTEM
+        ]
+        if not system_messages:
+            return
+        
+        warmup_conversation = Conversation(
+            model_name=self.conversation.model_name,
+            messages=system_messages
+        )
+        warmup_parameters = ModelParameters(**{**self.parameters.to_dict(), "num_predict": 1})
+        if self.keep_alive is not None:
+            warmup_parameters.keep_alive = self.keep_alive
+        
+        self.service.generate_response(warmup_conversation, warmup_parameters)
+    
     def register_mcp_executor(self, tool_name: str, executor: Any) -> None:
         """Register an MCP executor for a specific tool."""
         self.tool_registry.register_mcp_executor(tool_name, executor) 
\ No newline at end of file
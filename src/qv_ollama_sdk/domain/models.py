@@ -1,9 +1,32 @@
+import copy
+import hashlib
+import json
+import re
+import sys
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum, auto
-from typing import List, Optional, Dict, Any, Callable, Union
+from typing import List, Optional, Dict, Any, Callable, Union, get_type_hints
 from uuid import UUID, uuid4
 
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
+
+def _dumps_sorted(value: Any) -> bytes:
+    """Serialize a value to JSON bytes with sorted keys, e.g. for hashing.
+    
+    Uses orjson when it is installed and the standard json module otherwise.
+    Values JSON does not support are serialized with str(); like json,
+    orjson is told to accept non-string dictionary keys.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+
 
 class MessageRole(str, Enum):
     """Enumeration of possible message roles in a conversation."""
@@ -13,21 +36,67 @@ class MessageRole(str, Enum):
     TOOL = "tool"
 
 
-@dataclass
+# Numeric strings in tool call arguments that are cast to int or float
+_INT_RE = re.compile(r"-?[0-9]+")
+_FLOAT_RE = re.compile(r"-?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?")
+
+# History hash of a conversation without messages
+_EMPTY_HISTORY_DIGEST = hashlib.blake2b(digest_size=16).digest()
+
+# Plain string value of each role, looked up once per message when serializing
+_ROLE_VALUES = {role: role.value for role in MessageRole}
+_ROLES_BY_VALUE = {role.value: role for role in MessageRole}
+
+
+def _to_role(value: str) -> MessageRole:
+    """Get the role for a role string (a dict lookup instead of an enum call)."""
+    role = _ROLES_BY_VALUE.get(value)
+    # Unknown roles still raise the enum's ValueError
+    return role if role is not None else MessageRole(value)
+
+
+@dataclass(frozen=True, slots=True)
 class Function:
     """Represents a function definition for tool calling."""
     name: str
     arguments: Dict[str, Any]
 
 
-@dataclass 
-class ToolCall:
-    """Represents a tool call made by the model."""
+class _ToolCallSlots:
+    """Private state of a ToolCall, kept outside the dataclass fields."""
+    # Cached API dictionary; unset until to_api_dict is first called
+    __slots__ = ("_api_dict",)
+
+
+@dataclass(frozen=True, slots=True)
+class ToolCall(_ToolCallSlots):
+    """Represents a tool call made by the model.
+    
+    Tool calls are immutable, so their API dictionary can be cached safely.
+    """
     function: Function
     id: Optional[str] = None  # Tool call ID for tracking
+    
+    def to_api_dict(self) -> Dict[str, Any]:
+        """Convert the tool call to the Ollama API format.
+        
+        The dictionary is built on the first call and reused afterwards, so it
+        must not be modified.
+        """
+        api_dict = getattr(self, "_api_dict", None)
+        if api_dict is None:
+            api_dict = {
+                "function": {
+                    "name": self.function.name,
+                    "arguments": self.function.arguments
+                }
+            }
+            # Bypass the frozen __setattr__ for the private cache slot
+            object.__setattr__(self, "_api_dict", api_dict)
+        return api_dict
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolResult:
     """Represents the result of executing a tool call."""
     tool_call_id: Optional[str]
@@ -37,15 +106,46 @@ class ToolResult:
     execution_time: Optional[float] = None
 
 
-@dataclass
-class ToolRegistry:
+class _ToolRegistrySlots:
+    """Private state of a ToolRegistry, kept outside the dataclass fields."""
+    # Per function: argument name -> cast to the annotated type
+    __slots__ = ("_arg_casters",)
+
+
+@dataclass(slots=True)
+class ToolRegistry(_ToolRegistrySlots):
     """Registry of available functions for tool execution."""
     functions: Dict[str, Callable] = field(default_factory=dict)
     mcp_executors: Dict[str, Any] = field(default_factory=dict)  # MCP tool executors
     
+    # Annotations that tool arguments are cast to
+    _castable_types = (int, float, str)
+    
+    def __post_init__(self):
+        """Look up the argument casts of the functions passed to the constructor."""
+        self._arg_casters = {
+            name: self._build_arg_casters(func) for name, func in self.functions.items()
+        }
+    
     def register(self, func: Callable) -> None:
         """Register a function for tool calling."""
-        self.functions[func.__name__] = func
+        # Interned names match the interned names of parsed tool calls by identity
+        name = sys.intern(func.__name__)
+        if self.functions.get(name) is func:
+            return
+        self.functions[name] = func
+        self._arg_casters[name] = self._build_arg_casters(func)
+    
+    def _build_arg_casters(self, func: Callable) -> Dict[str, Callable]:
+        """Look up once which arguments of a function are annotated as int, float or str."""
+        try:
+            hints = get_type_hints(func)
+        except Exception:
+            return {}
+        return {
+            name: hint for name, hint in hints.items()
+            if name != "return" and hint in self._castable_types
+        }
     
     def get_function(self, name: str) -> Optional[Callable]:
         """Get a registered function by name."""
@@ -63,7 +163,7 @@ class ToolRegistry:
         if function_name in self.mcp_executors:
             try:
                 executor = self.mcp_executors[function_name]
-                result =executor.execute_tool_call(tool_call)
+                result = executor.execute_tool_call(tool_call)
             
                 return ToolResult(
                     tool_call_id=tool_call.id,
@@ -93,16 +193,25 @@ class ToolRegistry:
         try:
             # Execute the function with type casting for safety
             args = tool_call.function.arguments
-            # Cast numeric arguments to appropriate types
+            casters = self._arg_casters.get(function_name) or {}
+            # Cast string arguments to their annotated type, or numeric strings to
+            # numbers; other values are passed through, so nothing is lost
             casted_args = {}
             for key, value in args.items():
-                if isinstance(value, str) and value.isdigit():
-                    casted_args[key] = int(value)
-                elif isinstance(value, str):
+                if not isinstance(value, str):
+                    casted_args[key] = value
+                    continue
+                caster = casters.get(key)
+                if caster is not None:
                     try:
-                        casted_args[key] = float(value)
-                    except ValueError:
-                        casted_args[key] = value
+                        casted_args[key] = caster(value)
+                        continue
+                    except (TypeError, ValueError):
+                        pass
+                if _INT_RE.fullmatch(value):
+                    casted_args[key] = int(value)
+                elif _FLOAT_RE.fullmatch(value):
+                    casted_args[key] = float(value)
                 else:
                     casted_args[key] = value
             
@@ -122,13 +231,42 @@ class ToolRegistry:
             )
 
 
-@dataclass
-class Message:
+class _IdSlot:
+    """Base class holding the value of a _LazyUUID id outside the dataclass fields."""
+    __slots__ = ("_id",)
+
+
+class _LazyUUID:
+    """Dataclass field descriptor for ids that are only generated when first read.
+    
+    Most messages and responses never have their id read, so generating a
+    uuid4 for each one up front is wasted work. The value is stored in the
+    "_id" slot of _IdSlot, which is not a dataclass field. Slotted dataclasses
+    replace the descriptor with a plain slot, so it is installed on the class
+    again after the class is created.
+    """
+    
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            # Default value for the dataclass __init__
+            return None
+        value = getattr(obj, "_id", None)
+        if value is None:
+            value = uuid4()
+            obj._id = value
+        return value
+    
+    def __set__(self, obj, value):
+        obj._id = value
+
+
+@dataclass(slots=True)
+class Message(_IdSlot):
     """Represents a single message in a conversation."""
     role: MessageRole
     content: str
     images: Optional[List[Union[str, bytes]]] = None
-    id: UUID = field(default_factory=uuid4)
+    id: UUID = _LazyUUID()
     created_at: datetime = field(default_factory=datetime.now)
     metadata: Dict[str, Any] = field(default_factory=dict)
     tool_calls: Optional[List[ToolCall]] = None
@@ -137,7 +275,7 @@ class Message:
     def to_dict(self) -> Dict[str, Any]:
         """Convert message to a dictionary format for the Ollama API."""
         message_dict = {
-            "role": self.role.value,
+            "role": _ROLE_VALUES[self.role],
             "content": self.content
         }
         
@@ -147,15 +285,7 @@ class Message:
 
         # Add tool_calls for assistant messages
         if self.tool_calls:
-            message_dict["tool_calls"] = [
-                {
-                    "function": {
-                        "name": tc.function.name,
-                        "arguments": tc.function.arguments
-                    }
-                }
-                for tc in self.tool_calls
-            ]
+            message_dict["tool_calls"] = [tc.to_api_dict() for tc in self.tool_calls]
         
         # Add tool call reference for tool result messages
         if self.role == MessageRole.TOOL and self.tool_call_id:
@@ -167,7 +297,7 @@ class Message:
         """Convert message to a dictionary format for database storage."""
         db_dict = {
             "id": str(self.id),
-            "role": self.role.value,
+            "role": _ROLE_VALUES[self.role],
             "content": self.content,
             "created_at": self.created_at.isoformat(),
             "metadata": self.metadata
@@ -175,13 +305,7 @@ class Message:
         
         if self.tool_calls:
             db_dict["tool_calls"] = [
-                {
-                    "function": {
-                        "name": tc.function.name,
-                        "arguments": tc.function.arguments
-                    },
-                    "id": tc.id
-                }
+                {"function": tc.to_api_dict()["function"], "id": tc.id}
                 for tc in self.tool_calls
             ]
         
@@ -208,45 +332,130 @@ class Message:
         
         return cls(
             id=UUID(data["id"]),
-            role=MessageRole(data["role"]),
+            role=_to_role(data["role"]),
             content=data["content"],
             created_at=datetime.fromisoformat(data["created_at"]),
             metadata=data.get("metadata", {}),
             tool_calls=tool_calls,
             tool_call_id=data.get("tool_call_id")
         )
+    
+    @classmethod
+    def from_db_dicts(cls, rows: List[Dict[str, Any]]) -> List['Message']:
+        """Create Message instances from several rows in database dictionary format.
+        
+        Args:
+            rows: The stored messages, e.g. the history of a conversation
+            
+        Returns:
+            The messages in the order of the rows
+        """
+        from_db_dict = cls.from_db_dict
+        return [from_db_dict(row) for row in rows]
+
+
+Message.id = _LazyUUID()
+
 
+class _ConversationSlots(_IdSlot):
+    """Private state of a Conversation, kept outside the dataclass fields."""
+    __slots__ = (
+        # Backing values of the updated_at property (see below Conversation)
+        "_updated_ns",
+        "_updated_at",
+        # API dictionaries of the messages, built incrementally by
+        # get_message_history, and the message the cache ends with
+        "_history_cache",
+        "_history_tail",
+        # Hash chained over the cached message dictionaries (None: rebuilt by state_hash)
+        "_history_digest",
+    )
 
-@dataclass
-class Conversation:
+
+@dataclass(slots=True)
+class Conversation(_ConversationSlots):
     """Represents a complete conversation consisting of multiple messages."""
     model_name: str = "llama3"
-    id: UUID = field(default_factory=uuid4)
+    id: UUID = _LazyUUID()
     title: Optional[str] = None
     messages: List[Message] = field(default_factory=list)
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # Keep at most this many messages; the oldest non-system messages are dropped
+    max_messages: Optional[int] = None
+    
+    def __post_init__(self):
+        """Set up the history cache and apply max_messages to the messages passed in."""
+        self._history_cache = []
+        self._history_tail = None
+        self._history_digest = _EMPTY_HISTORY_DIGEST
+        self._trim()
     
     def add_system_message(self, content: str) -> Message:
         """Add a system message to the conversation."""
         message = Message(role=MessageRole.SYSTEM, content=content)
         self.messages.append(message)
-        self.updated_at = datetime.now()
+        self._trim()
+        self._touch()
+        return message
+    
+    def set_system_message(self, content: str) -> Message:
+        """Replace the system message(s) of the conversation.
+        
+        The first system message is replaced in place and any further ones
+        are removed, so the other messages keep their order. Without a system
+        message, the new one is inserted at the start.
+        
+        When only one system message is replaced, its cached dictionary is
+        swapped in place, so the message history is not rebuilt.
+        """
+        message = Message(role=MessageRole.SYSTEM, content=content)
+        messages = self.messages
+        cached = self._history_cache
+        cache_valid = bool(cached) and len(cached) <= len(messages) and messages[len(cached) - 1] is self._history_tail
+        
+        position = None
+        write = 0
+        for existing in messages:
+            if existing.role == MessageRole.SYSTEM:
+                if position is not None:
+                    continue
+                position = write
+                existing = message
+            messages[write] = existing
+            write += 1
+        removed = len(messages) - write
+        del messages[write:]
+        
+        if position is None:
+            messages.insert(0, message)
+            self._reset_history()
+        elif removed or not cache_valid or position >= len(cached):
+            self._reset_history()
+        else:
+            cached[position] = message.to_dict()
+            if position == len(cached) - 1:
+                self._history_tail = message
+            # The hash covers the whole history, so state_hash() rebuilds it
+            self._history_digest = None
+        self._touch()
         return message
     
     def add_user_message(self, content: str, images: Optional[List] = None) -> Message:
         """Add a user message to the conversation."""
         message = Message(role=MessageRole.USER, content=content, images=images)
         self.messages.append(message)
-        self.updated_at = datetime.now()
+        self._trim()
+        self._touch()
         return message
     
     def add_assistant_message(self, content: str) -> Message:
         """Add an assistant message to the conversation."""
         message = Message(role=MessageRole.ASSISTANT, content=content)
         self.messages.append(message)
-        self.updated_at = datetime.now()
+        self._trim()
+        self._touch()
         return message
     
     def add_tool_message(self, content: str, tool_call_id: str, function_name: str) -> Message:
@@ -258,11 +467,16 @@ class Conversation:
             metadata={"function_name": function_name}
         )
         self.messages.append(message)
-        self.updated_at = datetime.now()
+        self._trim()
+        self._touch()
         return message
     
     def add_tool_results(self, tool_results: List[ToolResult]) -> List[Message]:
-        """Add multiple tool result messages to the conversation."""
+        """Add multiple tool result messages to the conversation.
+        
+        The messages share one creation timestamp and are appended at once.
+        """
+        now = datetime.now()
         messages = []
         for result in tool_results:
             if result.error:
@@ -270,22 +484,232 @@ class Conversation:
             else:
                 content = str(result.result)
             
-            message = self.add_tool_message(
+            messages.append(Message(
+                role=MessageRole.TOOL,
                 content=content,
                 tool_call_id=result.tool_call_id or "",
-                function_name=result.function_name
-            )
-            messages.append(message)
+                metadata={"function_name": result.function_name},
+                created_at=now
+            ))
+        self.messages.extend(messages)
+        self._trim()
+        self._touch()
         return messages
     
+    def extend_messages(self, messages: List[Dict[str, Any]]) -> List[Message]:
+        """Add several messages to the conversation at once.
+        
+        Args:
+            messages: Message dictionaries in the Ollama API format, each with
+                "role" and "content" and optionally "images"
+        """
+        new_messages = [
+            Message(
+                role=_to_role(message["role"]),
+                content=message["content"],
+                images=message.get("images")
+            )
+            for message in messages
+        ]
+        self.messages.extend(new_messages)
+        self._trim()
+        self._touch()
+        return new_messages
+    
     def get_message_history(self) -> List[Dict[str, str]]:
-        """Get the message history in a format suitable for the Ollama API."""
-        return [message.to_dict() for message in self.messages]
+        """Get the message history in a format suitable for the Ollama API.
+        
+        The message dictionaries are cached, so only messages added since the
+        last call are converted. Messages are expected to be appended; use the
+        conversation methods to replace or remove messages.
+        
+        Returns copies, so changing them does not change later requests or
+        the state hash.
+        """
+        return copy.deepcopy(self._sync_history())
+    
+    def _request_messages(self) -> List[Dict[str, Any]]:
+        """Get the cached message dictionaries for a request, without copying them.
+        
+        Used by the service only; the dictionaries are shared with the cache
+        and must not be changed.
+        """
+        return list(self._sync_history())
+    
+    def state_hash(self) -> bytes:
+        """Get a hash of the message history, e.g. for use as a cache key.
+        
+        The hash is updated incrementally with the messages added since the
+        last call, so it does not rehash the whole history. Only replacing the
+        system message makes the next call rehash the cached dictionaries.
+        
+        Returns:
+            A 16-byte BLAKE2b digest
+        """
+        cache = self._sync_history()
+        if self._history_digest is None:
+            self._history_digest = _EMPTY_HISTORY_DIGEST
+            for message_dict in cache:
+                self._hash_message_dict(message_dict)
+        return self._history_digest
+    
+    def _sync_history(self) -> List[Dict[str, Any]]:
+        """Bring the cached message dictionaries and the history hash up to date."""
+        cache = self._history_cache
+        messages = self.messages
+        count = len(cache)
+        
+        # Rebuild if messages were removed or replaced behind our back
+        if count > len(messages) or (count and messages[count - 1] is not self._history_tail):
+            self._reset_history()
+            count = 0
+        
+        if count < len(messages):
+            # A missing hash is rebuilt from the whole cache by state_hash()
+            hashing = self._history_digest is not None
+            for message in messages[count:]:
+                message_dict = message.to_dict()
+                cache.append(message_dict)
+                if hashing:
+                    self._hash_message_dict(message_dict)
+            self._history_tail = messages[-1]
+        return cache
+    
+    def _hash_message_dict(self, message_dict: Dict[str, Any]) -> None:
+        """Add one message dictionary to the history hash.
+        
+        The new hash covers the previous one and the message, so the hash
+        is kept as plain bytes that copy and pickle with the conversation.
+        """
+        encoded = _dumps_sorted(message_dict)
+        hasher = hashlib.blake2b(self._history_digest, digest_size=16)
+        hasher.update(len(encoded).to_bytes(8, "little"))
+        hasher.update(encoded)
+        self._history_digest = hasher.digest()
+    
+    def _trim(self) -> None:
+        """Drop the oldest messages beyond max_messages.
+        
+        A system message at the start is kept, and tool results whose tool
+        call was dropped are dropped with it. The newest message and the tool
+        results that follow it are always kept, even if that leaves more than
+        max_messages. The cached message dictionaries are trimmed the same
+        way, so the history is not rebuilt.
+        """
+        limit = self.max_messages
+        messages = self.messages
+        if limit is None or len(messages) <= limit:
+            return
+        
+        start = 1 if messages[0].role == MessageRole.SYSTEM else 0
+        end = start + len(messages) - limit
+        while end < len(messages) and messages[end].role == MessageRole.TOOL:
+            end += 1
+        # Never drop the newest turn: the last message before trailing tool results
+        newest = len(messages) - 1
+        while newest > start and messages[newest].role == MessageRole.TOOL:
+            newest -= 1
+        end = min(end, newest)
+        if end <= start:
+            return
+        
+        cache = self._history_cache
+        if len(cache) >= end and messages[len(cache) - 1] is self._history_tail:
+            del messages[start:end]
+            del cache[start:end]
+            self._history_tail = messages[len(cache) - 1] if cache else None
+            # The hash covers the whole history, so state_hash() rebuilds it
+            self._history_digest = None
+        else:
+            del messages[start:end]
+            self._reset_history()
+    
+    def _reset_history(self) -> None:
+        """Drop the cached message dictionaries and the history hash."""
+        self._history_cache.clear()
+        self._history_tail = None
+        self._history_digest = _EMPTY_HISTORY_DIGEST
+    
+    def fork(self) -> 'Conversation':
+        """Get a copy of the conversation to add messages to.
+        
+        The copy starts with the cached message dictionaries and history hash
+        of this conversation, so the shared prefix is not converted again and
+        is sent exactly as before. Messages added to the copy do not change
+        this conversation.
+        """
+        cache = self._sync_history()
+        forked = Conversation(model_name=self.model_name, messages=self.messages.copy())
+        forked._history_cache.extend(cache)
+        forked._history_tail = self._history_tail
+        forked._history_digest = self._history_digest
+        return forked
+    
+    def to_onto(self) -> str:
+        """Get the non-system messages as a compact table.
+        
+        The field names are written once in a header line instead of once per
+        message, which takes fewer prompt tokens than the JSON message list.
+        
+        Returns:
+            A "role|content" header followed by one line per message
+        """
+        lines = ["role|content"]
+        for message in self.messages:
+            if message.role == MessageRole.SYSTEM:
+                continue
+            content = message.content.replace("\n", "\\n")
+            lines.append(f"{_ROLE_VALUES[message.role]}|{content}")
+        return "\n".join(lines)
+    
+    def compact(self) -> 'Conversation':
+        """Get a copy with the earlier turns folded into one compact message.
+        
+        System messages and the last message are kept as they are. Earlier
+        turns are sent as a single user message in the to_onto() format.
+        Conversations with tool calls, tool results or images are returned
+        unchanged, since those need the structured message format.
+        
+        Returns:
+            The compacted conversation, or this conversation if there is nothing to fold
+        """
+        system_messages = [m for m in self.messages if m.role == MessageRole.SYSTEM]
+        turns = [m for m in self.messages if m.role != MessageRole.SYSTEM]
+        if len(turns) < 3 or any(m.tool_calls or m.images or m.role == MessageRole.TOOL for m in turns):
+            return self
+        
+        earlier = Conversation(model_name=self.model_name, messages=turns[:-1])
+        summary = Message(role=MessageRole.USER, content="Conversation so far:\n" + earlier.to_onto())
+        return Conversation(
+            model_name=self.model_name,
+            messages=system_messages + [summary, turns[-1]]
+        )
     
     def clear(self) -> None:
         """Clear all messages from the conversation."""
         self.messages.clear()
-        self.updated_at = datetime.now()
+        self._reset_history()
+        self._touch()
+    
+    def _touch(self) -> None:
+        """Mark the conversation as updated now.
+        
+        Only records a nanosecond timestamp; the datetime is created when
+        updated_at is read.
+        """
+        self._updated_ns = time.time_ns()
+    
+    def _get_updated_at(self) -> datetime:
+        """Get when the conversation was last updated."""
+        if self._updated_ns:
+            self._updated_at = datetime.fromtimestamp(self._updated_ns / 1e9)
+            self._updated_ns = 0
+        return self._updated_at
+    
+    def _set_updated_at(self, value: datetime) -> None:
+        """Set when the conversation was last updated."""
+        self._updated_at = value
+        self._updated_ns = 0
     
     def to_db_dict(self) -> Dict[str, Any]:
         """Convert conversation to a dictionary format for database storage.
@@ -318,6 +742,12 @@ class Conversation:
         )
 
 
+Conversation.id = _LazyUUID()
+# updated_at stays a dataclass field for __init__, repr and comparison, but is
+# stored through the property so updates only record a cheap timestamp
+Conversation.updated_at = property(Conversation._get_updated_at, Conversation._set_updated_at)
+
+
 class ModelParameters:
     """Parameters for controlling model generation behavior.
     
@@ -335,9 +765,29 @@ class ModelParameters:
         repeat_penalty: How strongly to penalize repetitions.
         num_ctx: Context window size.
         think: Enable thinking mode for supported models.
+        keep_alive: How long the model stays loaded after a request (e.g. "30m").
         
     Any model-specific parameters can be provided through the constructor.
+    
+    think and keep_alive are sent as top-level request fields, all other
+    parameters as model options.
     """
+    
+    # Common parameters are stored in slots; None means "not set"
+    _common_params = (
+        'temperature', 'max_tokens', 'top_p', 'top_k', 'stop',
+        'frequency_penalty', 'presence_penalty', 'repeat_penalty', 'num_ctx', 'think',
+        'keep_alive'
+    )
+    __slots__ = _common_params + ('_extra', '_tuple_cache', '_options_cache')
+    
+    # Parameters sent as top-level request fields instead of options
+    _request_fields = ('think', 'keep_alive')
+    
+    # Map special parameter names to their API equivalents
+    _api_param_mapping = {
+        'max_tokens': 'num_predict'
+    }
 
     def __init__(self, **kwargs):
         """Initialize model parameters.
@@ -357,62 +807,86 @@ class ModelParameters:
             repeat_penalty: How strongly to penalize repetitions
             num_ctx: Context window size
             think: Enable thinking mode for supported models (True/False)
+            keep_alive: How long the model stays loaded after a request
         """
-        # Store parameters that were explicitly set
-        self._parameters = {}
+        for name in self._common_params:
+            object.__setattr__(self, name, None)
         
-        # Common parameters
-        self._common_params = [
-            'temperature', 'max_tokens', 'top_p', 'top_k', 'stop',
-            'frequency_penalty', 'presence_penalty', 'repeat_penalty', 'num_ctx', 'think'
-        ]
+        # Model-specific parameters that are not common parameters
+        object.__setattr__(self, '_extra', {})
+        object.__setattr__(self, '_tuple_cache', None)
+        object.__setattr__(self, '_options_cache', None)
         
         # Set provided parameters
         for key, value in kwargs.items():
-            self._parameters[key] = value
+            setattr(self, key, value)
         
     def __getattr__(self, name):
-        """Get a parameter value."""
-        if name in self._parameters:
-            return self._parameters[name]
+        """Get a model-specific parameter value (common parameters are slots)."""
+        if not name.startswith('_') and name in self._extra:
+            return self._extra[name]
         raise AttributeError(f"'ModelParameters' object has no attribute '{name}'")
     
     def __setattr__(self, name, value):
         """Set a parameter value."""
-        if name.startswith('_'):
-            # Private attributes
-            super().__setattr__(name, value)
+        if name.startswith('_') or name in self._common_params:
+            object.__setattr__(self, name, value)
         else:
-            # Parameters
-            self._parameters[name] = value
+            self._extra[name] = value
+        object.__setattr__(self, '_tuple_cache', None)
+        object.__setattr__(self, '_options_cache', None)
+    
+    def _as_tuple(self) -> tuple:
+        """Get all set parameters as a tuple of (name, value) pairs.
+        
+        The tuple is cached until a parameter changes, e.g. for use as a cache key.
+        """
+        if self._tuple_cache is None:
+            items = [(name, getattr(self, name)) for name in self._common_params]
+            items.extend(self._extra.items())
+            object.__setattr__(
+                self, '_tuple_cache', tuple(item for item in items if item[1] is not None)
+            )
+        return self._tuple_cache
         
     def to_dict(self) -> Dict[str, Any]:
-        """Convert parameters to a dictionary for API requests.
+        """Convert parameters to a dictionary of model options for API requests.
+        
+        The dictionary is cached until a parameter changes; a copy is returned.
         
         Returns:
-            Dictionary of explicitly set parameters
+            Dictionary of explicitly set parameters, without the top-level
+            request fields (think, keep_alive)
         """
-        params = {}
-        
-        # Map special parameter names to their API equivalents
-        api_param_mapping = {
-            'max_tokens': 'num_predict'
-        }
-        
-        for key, value in self._parameters.items():
-            # Use API-specific name if it exists
-            api_key = api_param_mapping.get(key, key)
-            params[api_key] = value
+        if self._options_cache is None:
+            params = {}
             
-        return params
+            for key, value in self._as_tuple():
+                if key in self._request_fields:
+                    continue
+                # Use API-specific name if it exists
+                api_key = self._api_param_mapping.get(key, key)
+                params[api_key] = value
+            object.__setattr__(self, '_options_cache', params)
+            
+        return dict(self._options_cache)
 
 
-@dataclass
-class GenerationResponse:
-    """Represents a response from the model generation."""
+@dataclass(slots=True)
+class GenerationResponse(_IdSlot):
+    """Represents a response from the model generation.
+    
+    kind is a bitmask of the parts the response carries (THINKING, CONTENT,
+    TOOL_CALLS, TOOL_RESULTS), so stream consumers can dispatch on one integer.
+    """
+    THINKING = 1
+    CONTENT = 2
+    TOOL_CALLS = 4
+    TOOL_RESULTS = 8
+    
     model_name: str
     content: str
-    id: UUID = field(default_factory=uuid4)
+    id: UUID = _LazyUUID()
     created_at: datetime = field(default_factory=datetime.now)
     raw_response: Optional[Dict[str, Any]] = None
     finish_reason: Optional[str] = None
@@ -420,3 +894,16 @@ class GenerationResponse:
     tool_calls: Optional[List[ToolCall]] = None
     tool_results: Optional[List[ToolResult]] = None
     thinking: Optional[str] = None  # Model's thinking process (thinking mode) 
+    kind: int = field(default=0, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        """Compute the kind bitmask from the parts that are set."""
+        self.kind = (
+            (self.THINKING if self.thinking else 0)
+            | (self.CONTENT if self.content else 0)
+            | (self.TOOL_CALLS if self.tool_calls else 0)
+            | (self.TOOL_RESULTS if self.tool_results else 0)
+        )
+
+
+GenerationResponse.id = _LazyUUID()
@@ -1,8 +1,14 @@
 """Service for interacting with the Ollama API for conversation generation."""
 
-import ollama
-from typing import Dict, Any, Optional, Iterator, List, Callable
-import re
+import asyncio
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import itertools
+import httpx
+from ollama import AsyncClient, Client, ResponseError
+from typing import Dict, Any, Optional, Iterator, AsyncIterator, List, Callable, ClassVar, Set, Tuple
+import sys
 
 from ..domain.models import (
     Conversation, 
@@ -13,17 +19,383 @@ from ..domain.models import (
     ToolCall,
     Function,
     ToolResult,
-    ToolRegistry
+    ToolRegistry,
+    _dumps_sorted
 )
 
+# Keep-alive pool shared by streaming and non-streaming calls of a service
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=16, keepalive_expiry=60)
+
+
+def _split_think(content: str) -> Tuple[str, Optional[str]]:
+    """Remove the <think>...</think> blocks that some models put into the content.
+    
+    Args:
+        content: The content of a complete response
+        
+    Returns:
+        The content without the blocks and the text of the first block,
+        or the unchanged content and None if there is no complete block
+    """
+    start = content.find("<think>")
+    if start < 0:
+        return content, None
+    end = content.find("</think>", start + 7)
+    if end < 0:
+        return content, None
+    thinking = content[start + 7:end]
+    parts = [content[:start]]
+    position = end + 8
+    # Further blocks are rare; keep removing them until none is left
+    while True:
+        start = content.find("<think>", position)
+        if start < 0:
+            break
+        end = content.find("</think>", start + 7)
+        if end < 0:
+            break
+        parts.append(content[position:start])
+        position = end + 8
+    parts.append(content[position:])
+    return "".join(parts).strip(), thinking.strip()
+
+
+def _parse_tool_calls(raw_tool_calls: List[Any]) -> List[ToolCall]:
+    """Convert the tool calls of a chat response into ToolCall objects."""
+    parsed = []
+    for tc in raw_tool_calls:
+        function = tc["function"]
+        parsed.append(ToolCall(
+            # Interned names match the interned names of registered functions by identity
+            function=Function(name=sys.intern(function["name"]), arguments=function["arguments"]),
+            id=tc.get("id")  # Extract tool call ID if available
+        ))
+    return parsed
+
+
+class _ThinkTagSplitter:
+    """Split streamed content into thinking and content at <think> tags.
+    
+    Streamed chunks only carry a few characters each, so a <think> block
+    spans many chunks and a tag can be split between two chunks. The
+    splitter keeps track of whether it is inside a block and holds back
+    the end of a chunk that could be the start of a tag.
+    """
+    
+    OPEN = "<think>"
+    CLOSE = "</think>"
+    
+    def __init__(self):
+        self.in_think = False
+        self.pending = ""
+        # Skip the whitespace between </think> and the answer
+        self.strip_content = False
+    
+    def feed(self, text: str):
+        """Split the next chunk of content.
+        
+        Args:
+            text: The content of the chunk
+            
+        Returns:
+            A (content, thinking) tuple with the parts of the chunk outside
+            and inside <think> blocks
+        """
+        if self.pending:
+            text = self.pending + text
+            self.pending = ""
+        elif not self.in_think and "<" not in text:
+            # Fast path: plain content
+            return self._content(text), ""
+        
+        content_parts = []
+        thinking_parts = []
+        while text:
+            tag = self.CLOSE if self.in_think else self.OPEN
+            parts = thinking_parts if self.in_think else content_parts
+            index = text.find(tag)
+            if index >= 0:
+                parts.append(text[:index])
+                text = text[index + len(tag):]
+                self.in_think = not self.in_think
+                self.strip_content = not self.in_think
+                continue
+            
+            # Hold back a possible partial tag at the end of the chunk
+            start = text.rfind("<", max(0, len(text) - len(tag) + 1))
+            if start >= 0 and tag.startswith(text[start:]):
+                self.pending = text[start:]
+                text = text[:start]
+            parts.append(text)
+            break
+        
+        return self._content("".join(content_parts)), "".join(thinking_parts)
+    
+    def flush(self):
+        """Get the held back text at the end of the stream as a (content, thinking) tuple."""
+        text, self.pending = self.pending, ""
+        if self.in_think:
+            return "", text
+        return self._content(text), ""
+    
+    def _content(self, text: str) -> str:
+        """Drop the whitespace right after a </think> tag."""
+        if self.strip_content and text:
+            text = text.lstrip()
+            self.strip_content = not text
+        return text
+
+
+# Threads for running tool functions from the async methods
+_TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="qv-ollama-tool")
+
 
 class OllamaConversationService:
     """Service for generating responses in conversations using the Ollama API."""
     
-    def __init__(self):
-        """Initialize the Ollama conversation service."""
-        pass
+    # Client shared by all service instances, so short-lived clients reuse its connections
+    _shared_client: ClassVar[Optional[Client]] = None
+    # Connection pool of the shared client, closed at exit
+    _shared_transport: ClassVar[Optional[httpx.HTTPTransport]] = None
+    
+    # Request fields ("tools", "think") a model rejected, per (host, model),
+    # so later requests leave them out instead of failing first
+    _unsupported_features: ClassVar[Dict[Tuple[Optional[str], str], Set[str]]] = {}
+    
+    # Maximum number of responses kept when cache_responses is enabled
+    # (least recently used first out)
+    RESPONSE_CACHE_SIZE = 256
+    
+    # Maximum number of tool lists whose ToolRegistry is kept for reuse
+    TOOL_REGISTRY_CACHE_SIZE = 32
+    
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        cache_responses: bool = False
+    ):
+        """Initialize the Ollama conversation service.
+        
+        Args:
+            host: Optional URL of the Ollama server (default: OLLAMA_HOST or
+                http://localhost:11434)
+            headers: Optional HTTP headers sent with every request
+            timeout: Optional request timeout in seconds
+            cache_responses: Whether generate_response() and agenerate_response()
+                return the earlier response for a repeated request without tools
+                or new images whose parameters set temperature=0 or a seed
+        
+        Services without any of these settings share one client and its
+        connection pool; otherwise the service gets its own client.
+        """
+        # Only pass the settings that were given, so ollama keeps its defaults
+        self._client_kwargs: Dict[str, Any] = {
+            key: value
+            for key, value in (("host", host), ("headers", headers), ("timeout", timeout))
+            if value is not None
+        }
+        if self._client_kwargs:
+            self._client = Client(
+                transport=httpx.HTTPTransport(retries=1, limits=_HTTP_LIMITS),
+                **self._client_kwargs
+            )
+        else:
+            self._client = self._get_shared_client()
+        # Async client, its transport and the event loop its connections belong to
+        self._async_client: Optional[AsyncClient] = None
+        self._async_transport: Optional[httpx.AsyncHTTPTransport] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Registries for calls without a tool_registry, per tuple of tools,
+        # least recently used first
+        self._tool_registries: Dict[Tuple[Callable, ...], ToolRegistry] = {}
+        self._response_cache: Optional[Dict[bytes, GenerationResponse]] = {} if cache_responses else None
 
+    @classmethod
+    def _get_shared_client(cls) -> Client:
+        """Get the Client shared by all services, creating it on first use."""
+        if cls._shared_client is None:
+            # ollama builds the httpx client itself, so keep the transport we pass
+            # in to close its pooled connections
+            cls._shared_transport = httpx.HTTPTransport(retries=1, limits=_HTTP_LIMITS)
+            cls._shared_client = Client(transport=cls._shared_transport)
+            atexit.register(cls._shared_transport.close)
+        return cls._shared_client
+
+    def _get_tool_registry(self, tools: List[Callable]) -> ToolRegistry:
+        """Get a ToolRegistry with the given tools, reusing the one of earlier calls.
+        
+        At most TOOL_REGISTRY_CACHE_SIZE registries are kept, so tool lists
+        built from new lambdas or closures on every call do not pile up.
+        """
+        registries = self._tool_registries
+        try:
+            key = tuple(tools)
+            # Move a cached registry to the most recently used end
+            tool_registry = registries.pop(key, None)
+        except TypeError:
+            # Unhashable callable objects cannot be cached
+            key, tool_registry = None, None
+        if tool_registry is None:
+            tool_registry = ToolRegistry()
+            for tool in tools:
+                tool_registry.register(tool)
+            if key is not None and len(registries) >= self.TOOL_REGISTRY_CACHE_SIZE:
+                del registries[next(iter(registries))]
+        if key is not None:
+            registries[key] = tool_registry
+        return tool_registry
+
+    def _get_async_client(self) -> AsyncClient:
+        """Get the AsyncClient of the running event loop, creating it on first use.
+        
+        Pooled connections belong to the event loop that opened them, so
+        another loop (e.g. of a later asyncio.run call) gets a new client.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_transport = httpx.AsyncHTTPTransport(retries=1, limits=_HTTP_LIMITS)
+            self._async_client = AsyncClient(transport=self._async_transport, **self._client_kwargs)
+            self._async_loop = loop
+        return self._async_client
+
+    async def _aclose_async_client(self) -> None:
+        """Close the connections of the running event loop's AsyncClient, if any."""
+        if self._async_client is None or self._async_loop is not asyncio.get_running_loop():
+            return
+        transport = self._async_transport
+        self._async_client = self._async_transport = self._async_loop = None
+        await transport.aclose()
+
+    def _build_chat_kwargs(
+        self,
+        conversation: Conversation,
+        parameters: Optional[ModelParameters] = None,
+        tools: Optional[List[Callable]] = None,
+        stream: bool = False
+    ) -> Dict[str, Any]:
+        """Build the keyword arguments of a chat request.
+        
+        Args:
+            conversation: The conversation to generate a response for
+            parameters: Optional model parameters to use for generation
+            tools: Optional list of Python functions that can be called by the model
+            stream: Whether the response is streamed
+            
+        Returns:
+            The keyword arguments for Client.chat / AsyncClient.chat
+        """
+        chat_kwargs = {
+            "model": conversation.model_name,
+            "messages": conversation._request_messages(),
+            "options": parameters.to_dict() if parameters else {}
+        }
+        if stream:
+            chat_kwargs["stream"] = True
+        unsupported = self._unsupported_features.get(self._capability_key(conversation.model_name), ())
+        
+        # Add tools if provided
+        if tools and "tools" not in unsupported:
+            chat_kwargs["tools"] = tools
+        
+        if parameters:
+            # Handle thinking mode separately (not in options)
+            think = parameters.think
+            if think is not None and "think" not in unsupported:
+                chat_kwargs["think"] = think
+            
+            # Keep the model (and its cached prompt) loaded between requests
+            keep_alive = parameters.keep_alive
+            if keep_alive is not None:
+                chat_kwargs["keep_alive"] = keep_alive
+        
+        return chat_kwargs
+    
+    def _capability_key(self, model_name: str) -> Tuple[Optional[str], str]:
+        """Get the key of a model in _unsupported_features."""
+        return (self._client_kwargs.get("host"), model_name)
+    
+    def _drop_unsupported(self, chat_kwargs: Dict[str, Any], error: ResponseError) -> bool:
+        """Remove the features a model rejected from a failed request.
+        
+        The features are remembered for the model, so later requests are
+        built without them.
+        
+        Args:
+            chat_kwargs: The keyword arguments of the failed request, changed in place
+            error: The error the request failed with
+            
+        Returns:
+            Whether a feature was removed and the request should be retried
+        """
+        # Ollama rejects unsupported features with 400 "<model> does not support <feature>"
+        if error.status_code != 400:
+            return False
+        error_msg = error.error
+        unsupported = set()
+        if "tools" in chat_kwargs and "does not support tools" in error_msg:
+            unsupported.add("tools")
+        if "think" in chat_kwargs and "does not support thinking" in error_msg:
+            unsupported.add("think")
+        if not unsupported:
+            return False
+        
+        for feature in unsupported:
+            del chat_kwargs[feature]
+        self._unsupported_features.setdefault(self._capability_key(chat_kwargs["model"]), set()).update(unsupported)
+        return True
+    
+    def _cache_key(
+        self,
+        conversation: Conversation,
+        parameters: Optional[ModelParameters],
+        tools: Optional[List[Callable]]
+    ) -> Optional[bytes]:
+        """Get the response cache key for a request.
+        
+        Returns:
+            A hash of the model, the message history and the parameters, or
+            None if caching is disabled or the request is not deterministic
+        """
+        if self._response_cache is None or tools or parameters is None:
+            return None
+        # Images may be file paths whose content changes between requests
+        messages = conversation.messages
+        if messages and messages[-1].images:
+            return None
+        set_parameters = parameters._as_tuple()
+        options = dict(set_parameters)
+        if options.get("temperature") != 0 and options.get("seed") is None:
+            return None
+        
+        hasher = hashlib.blake2b(conversation.state_hash(), digest_size=16)
+        hasher.update(_dumps_sorted([conversation.model_name, set_parameters]))
+        return hasher.digest()
+    
+    def _cached_response(self, cache_key: Optional[bytes]) -> Optional[GenerationResponse]:
+        """Get the cached response for a cache key and mark it as recently used."""
+        if cache_key is None:
+            return None
+        response = self._response_cache.pop(cache_key, None)
+        if response is not None:
+            # Move the entry to the most recently used end
+            self._response_cache[cache_key] = response
+        return response
+    
+    def _cache_response(self, cache_key: Optional[bytes], response: GenerationResponse) -> None:
+        """Store a response under its cache key, dropping the least recently used entry when full."""
+        if cache_key is None:
+            return
+        if len(self._response_cache) >= self.RESPONSE_CACHE_SIZE:
+            del self._response_cache[next(iter(self._response_cache))]
+        self._response_cache[cache_key] = response
+    
+    def clear_cache(self) -> None:
+        """Clear the response cache."""
+        if self._response_cache is not None:
+            self._response_cache.clear()
+    
     def generate_response(
         self, 
         conversation: Conversation, 
@@ -40,94 +412,192 @@ class OllamaConversationService:
         Returns:
             A GenerationResponse containing the generated content and any tool calls
         """
-        params = parameters.to_dict() if parameters else ModelParameters().to_dict()
+        cache_key = self._cache_key(conversation, parameters, tools)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
         
-        # Build chat request
-        chat_kwargs = {
-            "model": conversation.model_name,
-            "messages": conversation.get_message_history(),
-            "options": params
-        }
+        chat_kwargs = self._build_chat_kwargs(conversation, parameters, tools)
         
-        # Add tools if provided
-        if tools:
-            chat_kwargs["tools"] = tools
+        # Try with all features; leave out the ones the model rejects
+        while True:
+            try:
+                response = self._client.chat(**chat_kwargs)
+                break
+            except ResponseError as e:
+                if not self._drop_unsupported(chat_kwargs, e):
+                    raise
+        
+        response = self._parse_response(conversation, response)
+        self._cache_response(cache_key, response)
+        return response
+
+    async def agenerate_response(
+        self,
+        conversation: Conversation,
+        parameters: Optional[ModelParameters] = None,
+        tools: Optional[List[Callable]] = None
+    ) -> GenerationResponse:
+        """Asynchronously generate a response for the given conversation.
         
-        # Handle thinking mode separately (not in options)
-        if parameters and hasattr(parameters, 'think'):
-            chat_kwargs["think"] = parameters.think
+        Independent conversations can be generated concurrently with
+        asyncio.gather; the Ollama server processes up to OLLAMA_NUM_PARALLEL
+        requests per model at the same time.
         
-        # Try with full features first, fallback gracefully if model doesn't support them
-        try:
-            response = ollama.chat(**chat_kwargs)
-        except Exception as e:
-            error_msg = str(e).lower()
+        Args:
+            conversation: The conversation to generate a response for
+            parameters: Optional model parameters to use for generation
+            tools: Optional list of Python functions that can be called by the model
+            
+        Returns:
+            A GenerationResponse containing the generated content and any tool calls
+        """
+        cache_key = self._cache_key(conversation, parameters, tools)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        chat_kwargs = self._build_chat_kwargs(conversation, parameters, tools)
+        
+        # Same fallback strategy as generate_response
+        while True:
+            try:
+                response = await self._get_async_client().chat(**chat_kwargs)
+                break
+            except ResponseError as e:
+                if not self._drop_unsupported(chat_kwargs, e):
+                    raise
+        
+        response = self._parse_response(conversation, response)
+        self._cache_response(cache_key, response)
+        return response
+
+    async def agenerate_many(
+        self,
+        conversations: List[Conversation],
+        parameters: Optional[ModelParameters] = None,
+        tools: Optional[List[Callable]] = None,
+        concurrency: int = 8
+    ) -> List[GenerationResponse]:
+        """Asynchronously generate responses for several conversations.
+        
+        At most concurrency requests are sent at the same time; set it to the
+        OLLAMA_NUM_PARALLEL setting of the server.
+        
+        Args:
+            conversations: The conversations to generate responses for
+            parameters: Optional model parameters to use for generation
+            tools: Optional list of Python functions that can be called by the model
+            concurrency: Maximum number of requests in flight
             
-            # Check what features are causing issues
-            tools_unsupported = tools and ("tools" in error_msg or "does not support tools" in error_msg)
-            thinking_unsupported = "think" in chat_kwargs and ("think" in error_msg or "thinking" in error_msg)
+        Returns:
+            One GenerationResponse per conversation, in the order of the conversations
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def generate(conversation: Conversation) -> GenerationResponse:
+            async with semaphore:
+                return await self.agenerate_response(conversation, parameters, tools)
+        
+        return list(await asyncio.gather(*(generate(conversation) for conversation in conversations)))
+
+    def generate_many(
+        self,
+        conversations: List[Conversation],
+        parameters: Optional[ModelParameters] = None,
+        tools: Optional[List[Callable]] = None,
+        concurrency: int = 8
+    ) -> List[GenerationResponse]:
+        """Generate responses for several conversations concurrently.
+        
+        Blocking wrapper around agenerate_many; must not be called from a
+        running event loop. The connections opened for the batch are closed
+        before returning, since their event loop ends with the call.
+        
+        Args:
+            conversations: The conversations to generate responses for
+            parameters: Optional model parameters to use for generation
+            tools: Optional list of Python functions that can be called by the model
+            concurrency: Maximum number of requests in flight
+            
+        Returns:
+            One GenerationResponse per conversation, in the order of the conversations
+        """
+        async def run() -> List[GenerationResponse]:
+            try:
+                return await self.agenerate_many(conversations, parameters, tools, concurrency)
+            finally:
+                await self._aclose_async_client()
+        
+        return asyncio.run(run())
+
+    async def astream_many(
+        self,
+        conversations: List[Conversation],
+        parameters: Optional[ModelParameters] = None,
+        tools: Optional[List[Callable]] = None,
+        concurrency: int = 8
+    ) -> AsyncIterator[Tuple[int, GenerationResponse]]:
+        """Asynchronously stream responses for several conversations at once.
+        
+        Args:
+            conversations: The conversations to generate responses for
+            parameters: Optional model parameters to use for generation
+            tools: Optional list of Python functions that can be called by the model
+            concurrency: Maximum number of streams in flight
             
-            # Try different fallback strategies
-            if tools_unsupported and thinking_unsupported:
-                # Both features unsupported - remove both
-                chat_kwargs_fallback = chat_kwargs.copy()
-                if "tools" in chat_kwargs_fallback:
-                    del chat_kwargs_fallback["tools"]
-                if "think" in chat_kwargs_fallback:
-                    del chat_kwargs_fallback["think"]
-                response = ollama.chat(**chat_kwargs_fallback)
-            elif tools_unsupported:
-                # Only tools unsupported - remove tools, keep thinking
-                chat_kwargs_fallback = chat_kwargs.copy()
-                del chat_kwargs_fallback["tools"]
-                try:
-                    response = ollama.chat(**chat_kwargs_fallback)
-                except Exception as e2:
-                    # If still failing, also remove thinking
-                    if "think" in chat_kwargs_fallback:
-                        del chat_kwargs_fallback["think"]
-                        response = ollama.chat(**chat_kwargs_fallback)
-                    else:
-                        raise e2
-            elif thinking_unsupported:
-                # Only thinking unsupported - remove thinking, keep tools
-                chat_kwargs_fallback = chat_kwargs.copy()
-                del chat_kwargs_fallback["think"]
-                response = ollama.chat(**chat_kwargs_fallback)
-            else:
-                raise e
+        Yields:
+            (index, chunk) tuples, where index is the position of the
+            conversation; chunks of different conversations are interleaved
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        
+        async def stream(index: int, conversation: Conversation) -> None:
+            try:
+                async with semaphore:
+                    async for chunk in self.astream_response(conversation, parameters, tools):
+                        await queue.put((index, chunk))
+            finally:
+                await queue.put(done)
+        
+        tasks = [asyncio.create_task(stream(index, conversation)) for index, conversation in enumerate(conversations)]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await queue.get()
+                if item is done:
+                    remaining -= 1
+                else:
+                    yield item
+            # Raise the first error of a failed stream
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _parse_response(self, conversation: Conversation, response: Any) -> GenerationResponse:
+        """Convert a non-streaming chat response into a GenerationResponse."""
+        # Look up the message once and reuse it for all fields
+        message = response.get("message") or {}
         
         # Extract the assistant's response
-        content = response.get("message", {}).get("content", "")
+        content = message.get("content") or ""
         
         # Extract thinking if present (both from separate field and from <think> tags)
-        thinking = None
-        if "message" in response and "thinking" in response["message"]:
-            thinking = response["message"]["thinking"]
+        thinking = message.get("thinking")
         
         # Also check for <think> tags in content and extract them
-        if "<think>" in content and "</think>" in content:
-            # Extract thinking from <think> tags
-            think_match = re.search(r'<think>(.*?)</think>', content, re.DOTALL)
-            if think_match:
-                if not thinking:  # Only use <think> content if no separate thinking field
-                    thinking = think_match.group(1).strip()
-                # Remove <think> tags from content
-                content = re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL).strip()
+        content, tag_thinking = _split_think(content)
+        if tag_thinking is not None and not thinking:  # Only use <think> content if no separate thinking field
+            thinking = tag_thinking
         
         # Extract tool calls if present
         tool_calls = None
-        if "message" in response and "tool_calls" in response["message"]:
-            tool_calls = [
-                ToolCall(
-                    function=Function(
-                        name=tc["function"]["name"],
-                        arguments=tc["function"]["arguments"]
-                    ),
-                    id=tc.get("id")  # Extract tool call ID if available
-                )
-                for tc in response["message"]["tool_calls"]
-            ]
+        raw_tool_calls = message.get("tool_calls")
+        if raw_tool_calls:
+            tool_calls = _parse_tool_calls(raw_tool_calls)
         
         # Create and return the generation response
         return GenerationResponse(
@@ -167,9 +637,10 @@ class OllamaConversationService:
         if not initial_response.tool_calls or not auto_execute or not tools:
             return initial_response
         
-        # Use provided registry or create new one
+        # Use provided registry or the cached one for these tools
         if tool_registry is None:
-            tool_registry = ToolRegistry()
+            tool_registry = self._get_tool_registry(tools)
+        else:
             for tool in tools:
                 tool_registry.register(tool)
         
@@ -180,10 +651,7 @@ class OllamaConversationService:
             tool_results.append(result)
         
         # Add assistant message with tool calls to conversation (temporarily)
-        temp_conversation = Conversation(
-            model_name=conversation.model_name,
-            messages=conversation.messages.copy()
-        )
+        temp_conversation = conversation.fork()
         
         # Add assistant message with tool calls
         assistant_msg = temp_conversation.add_assistant_message(initial_response.content)
@@ -206,6 +674,71 @@ class OllamaConversationService:
             tool_results=tool_results
         )
 
+    async def agenerate_response_with_tool_execution(
+        self,
+        conversation: Conversation,
+        parameters: Optional[ModelParameters] = None,
+        tools: Optional[List[Callable]] = None,
+        auto_execute: bool = True,
+        tool_registry: Optional[ToolRegistry] = None
+    ) -> GenerationResponse:
+        """Asynchronously generate a response with automatic tool execution.
+        
+        Args:
+            conversation: The conversation to generate a response for
+            parameters: Optional model parameters to use for generation
+            tools: Optional list of Python functions that can be called by the model
+            auto_execute: Whether to automatically execute tool calls and get final response
+            tool_registry: Optional pre-configured ToolRegistry (for MCP executors, etc.)
+            
+        Returns:
+            A GenerationResponse with executed tool results and final response
+        """
+        # First, get the initial response with tool calls
+        initial_response = await self.agenerate_response(conversation, parameters, tools)
+        
+        # If no tool calls or auto_execute is False, return initial response
+        if not initial_response.tool_calls or not auto_execute or not tools:
+            return initial_response
+        
+        # Use provided registry or the cached one for these tools
+        if tool_registry is None:
+            tool_registry = self._get_tool_registry(tools)
+        else:
+            for tool in tools:
+                tool_registry.register(tool)
+        
+        # Run the tool calls concurrently in the tool thread pool
+        loop = asyncio.get_running_loop()
+        tool_results = await asyncio.gather(*(
+            loop.run_in_executor(_TOOL_EXECUTOR, tool_registry.execute_tool_call, tool_call)
+            for tool_call in initial_response.tool_calls
+        ))
+        
+        # Add assistant message with tool calls to conversation (temporarily)
+        temp_conversation = conversation.fork()
+        
+        # Add assistant message with tool calls
+        assistant_msg = temp_conversation.add_assistant_message(initial_response.content)
+        assistant_msg.tool_calls = initial_response.tool_calls
+        
+        # Add tool result messages  
+        temp_conversation.add_tool_results(tool_results)
+        
+        # Get final response from model with tool results
+        final_response = await self.agenerate_response(temp_conversation, parameters)
+        
+        # Combine responses
+        return GenerationResponse(
+            model_name=conversation.model_name,
+            content=final_response.content,
+            raw_response=final_response.raw_response,
+            finish_reason=final_response.finish_reason,
+            usage=final_response.usage,
+            tool_calls=initial_response.tool_calls,
+            tool_results=list(tool_results)
+        )
+
     def stream_response(
         self, 
         conversation: Conversation, 
@@ -222,124 +755,87 @@ class OllamaConversationService:
         Yields:
             GenerationResponse chunks as they become available, including content and tool calls
         """
-        params = parameters.to_dict() if parameters else ModelParameters().to_dict()
+        chat_kwargs = self._build_chat_kwargs(conversation, parameters, tools, stream=True)
         
-        # Build chat request
-        chat_kwargs = {
-            "model": conversation.model_name,
-            "messages": conversation.get_message_history(),
-            "options": params,
-            "stream": True
-        }
+        # The request is only sent when the first chunk is fetched, so this is
+        # where unsupported tools or thinking are detected and left out
+        while True:
+            try:
+                stream = iter(self._client.chat(**chat_kwargs))
+                first_chunk = next(stream, None)
+                break
+            except ResponseError as e:
+                if not self._drop_unsupported(chat_kwargs, e):
+                    raise
+        if first_chunk is None:
+            return
+        # Put the first chunk back in front of the rest (chain adds no Python frame per chunk)
+        stream = itertools.chain((first_chunk,), stream)
         
-        # Add tools if provided
-        if tools:
-            chat_kwargs["tools"] = tools
+        splitter = _ThinkTagSplitter()
+        for chunk in stream:
+            yield self._parse_chunk(conversation, chunk, splitter)
         
-        # Handle thinking mode separately (not in options)
-        if parameters and hasattr(parameters, 'think'):
-            chat_kwargs["think"] = parameters.think
+        rest = self._flush_think_splitter(conversation, splitter)
+        if rest is not None:
+            yield rest
+
+    def _parse_chunk(self, conversation: Conversation, chunk: Any, splitter: _ThinkTagSplitter) -> GenerationResponse:
+        """Convert a streamed chat chunk into a GenerationResponse.
         
-        # Helper function to create and test a stream
-        def _create_stream_with_fallback(kwargs):
-            try:
-                stream = ollama.chat(**kwargs)
-                # Test stream by getting first chunk (this triggers the actual error)
-                stream_iter = iter(stream)
-                first_chunk = next(stream_iter)
-                # Return a generator that yields first chunk then continues with the rest
-                def stream_generator():
-                    yield first_chunk
-                    for chunk in stream_iter:
-                        yield chunk
-                return stream_generator()
-            except Exception as e:
-                error_msg = str(e).lower()
-                
-                # Check what features are causing issues
-                tools_unsupported = "tools" in kwargs and ("tools" in error_msg or "does not support tools" in error_msg)
-                thinking_unsupported = "think" in kwargs and ("think" in error_msg or "thinking" in error_msg)
-                
-                # Try different fallback strategies
-                if tools_unsupported and thinking_unsupported:
-                    # Both features unsupported - remove both
-                    fallback_kwargs = kwargs.copy()
-                    if "tools" in fallback_kwargs:
-                        del fallback_kwargs["tools"]
-                    if "think" in fallback_kwargs:
-                        del fallback_kwargs["think"]
-                    return ollama.chat(**fallback_kwargs)
-                elif tools_unsupported:
-                    # Only tools unsupported - remove tools, keep thinking
-                    fallback_kwargs = kwargs.copy()
-                    del fallback_kwargs["tools"]
-                    try:
-                        return _create_stream_with_fallback(fallback_kwargs)
-                    except Exception:
-                        # If still failing, also remove thinking
-                        if "think" in fallback_kwargs:
-                            del fallback_kwargs["think"]
-                            return ollama.chat(**fallback_kwargs)
-                        else:
-                            raise
-                elif thinking_unsupported:
-                    # Only thinking unsupported - remove thinking, keep tools
-                    fallback_kwargs = kwargs.copy()
-                    del fallback_kwargs["think"]
-                    return ollama.chat(**fallback_kwargs)
-                else:
-                    raise e
+        Args:
+            conversation: The conversation the response is generated for
+            chunk: The streamed chunk
+            splitter: The <think> tag state of the stream the chunk belongs to
+        """
+        # Only read the fields we need from the chunk's message; get() is a
+        # single lookup on both dicts and ollama's response models
+        message = chunk.get("message") or {}
+        content = message.get("content") or ""
+        thinking = message.get("thinking")
+        raw_tool_calls = message.get("tool_calls")
+        tool_calls = None
         
-        # Get the stream with fallback handling
-        stream = _create_stream_with_fallback(chat_kwargs)
+        # Move text inside <think> tags (which span many chunks) to thinking
+        content, tag_thinking = splitter.feed(content)
+        done = chunk.get("done")
+        if done:
+            # Text held back for a possible tag belongs to the final chunk
+            rest_content, rest_thinking = splitter.flush()
+            content += rest_content
+            tag_thinking += rest_thinking
+        if tag_thinking and not thinking:  # Only use <think> content if no separate thinking field
+            thinking = tag_thinking
         
-        for chunk in stream:
-            content = ""
-            tool_calls = None
-            thinking = None
-            
-            # Extract content
-            if "message" in chunk and "content" in chunk["message"]:
-                content = chunk["message"]["content"]
-            
-            # Extract thinking if present (both from separate field and from <think> tags)
-            if "message" in chunk and "thinking" in chunk["message"]:
-                thinking = chunk["message"]["thinking"]
-            
-            # Also check for <think> tags in content and extract them
-            if "<think>" in content and "</think>" in content:
-                # Extract thinking from <think> tags
-                think_match = re.search(r'<think>(.*?)</think>', content, re.DOTALL)
-                if think_match:
-                    if not thinking:  # Only use <think> content if no separate thinking field
-                        thinking = think_match.group(1).strip()
-                    # Remove <think> tags from content
-                    content = re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL).strip()
-            
-            # Extract tool calls if present
-            if "message" in chunk and "tool_calls" in chunk["message"]:
-                tool_calls = [
-                    ToolCall(
-                        function=Function(
-                            name=tc["function"]["name"],
-                            arguments=tc["function"]["arguments"]
-                        ),
-                        id=tc.get("id")  # Extract tool call ID if available
-                    )
-                    for tc in chunk["message"]["tool_calls"]
-                ]
-            
-            # Yield response chunk
-            yield GenerationResponse(
-                model_name=conversation.model_name,
-                content=content,
-                raw_response=chunk,
-                finish_reason=chunk.get("done"),
-                usage=chunk.get("prompt_eval_count", {}),
-                tool_calls=tool_calls,
-                thinking=thinking
-            )
-    
+        # Extract tool calls only for the few chunks that carry them
+        if raw_tool_calls:
+            tool_calls = _parse_tool_calls(raw_tool_calls)
+        
+        return GenerationResponse(
+            model_name=conversation.model_name,
+            content=content,
+            raw_response=chunk,
+            finish_reason=done,
+            usage=chunk.get("prompt_eval_count", {}),
+            tool_calls=tool_calls,
+            thinking=thinking
+        )
+
+    def _flush_think_splitter(self, conversation: Conversation, splitter: _ThinkTagSplitter) -> Optional[GenerationResponse]:
+        """Get a final chunk with the text the splitter held back, if any.
+        
+        Only needed for streams that end without a done chunk; the done
+        chunk itself takes the held back text.
+        """
+        content, thinking = splitter.flush()
+        if not content and not thinking:
+            return None
+        return GenerationResponse(
+            model_name=conversation.model_name,
+            content=content,
+            thinking=thinking or None
+        )
+
     def stream_response_with_tool_execution(
         self,
         conversation: Conversation,
@@ -361,13 +857,13 @@ class OllamaConversationService:
             GenerationResponse chunks, tool execution results, and final response chunks
         """
         # Collect initial response and tool calls
-        initial_content = ""
+        content_parts = []
         collected_tool_calls = []
         
         # Stream initial response
         for chunk in self.stream_response(conversation, parameters, tools):
             if chunk.content:
-                initial_content += chunk.content
+                content_parts.append(chunk.content)
             
             if chunk.tool_calls:
                 collected_tool_calls.extend(chunk.tool_calls)
@@ -378,9 +874,10 @@ class OllamaConversationService:
         if not collected_tool_calls or not auto_execute or not tools:
             return
         
-        # Use provided registry or create new one
+        # Use provided registry or the cached one for these tools
         if tool_registry is None:
-            tool_registry = ToolRegistry()
+            tool_registry = self._get_tool_registry(tools)
+        else:
             for tool in tools:
                 tool_registry.register(tool)
         
@@ -397,13 +894,10 @@ class OllamaConversationService:
             )
         
         # Create temporary conversation with tool results
-        temp_conversation = Conversation(
-            model_name=conversation.model_name,
-            messages=conversation.messages.copy()
-        )
+        temp_conversation = conversation.fork()
         
         # Add assistant message with tool calls
-        assistant_msg = temp_conversation.add_assistant_message(initial_content)
+        assistant_msg = temp_conversation.add_assistant_message("".join(content_parts))
         assistant_msg.tool_calls = collected_tool_calls
         
         # Add tool result messages
@@ -412,4 +906,127 @@ class OllamaConversationService:
         # Stream final response
         for chunk in self.stream_response(temp_conversation, parameters):
             yield chunk
-    
\ No newline at end of file
+
+    async def astream_response(
+        self,
+        conversation: Conversation,
+        parameters: Optional[ModelParameters] = None,
+        tools: Optional[List[Callable]] = None
+    ) -> AsyncIterator[GenerationResponse]:
+        """Asynchronously generate a streaming response for the given conversation.
+        
+        Args:
+            conversation: The conversation to generate a response for
+            parameters: Optional model parameters to use for generation
+            tools: Optional list of Python functions that can be called by the model
+            
+        Yields:
+            GenerationResponse chunks as they become available, including content and tool calls
+        """
+        chat_kwargs = self._build_chat_kwargs(conversation, parameters, tools, stream=True)
+        
+        first_chunk, stream = await self._aopen_stream(chat_kwargs)
+        if first_chunk is None:
+            return
+        
+        splitter = _ThinkTagSplitter()
+        yield self._parse_chunk(conversation, first_chunk, splitter)
+        async for chunk in stream:
+            yield self._parse_chunk(conversation, chunk, splitter)
+        
+        rest = self._flush_think_splitter(conversation, splitter)
+        if rest is not None:
+            yield rest
+    
+    async def _aopen_stream(self, kwargs: Dict[str, Any]):
+        """Open an async chat stream and fetch its first chunk.
+        
+        The request is only sent when the first chunk is fetched, so this is
+        where unsupported tools or thinking are detected and left out, as in
+        stream_response.
+        
+        Returns:
+            A tuple of the first chunk (None for an empty stream) and the stream
+        """
+        while True:
+            try:
+                stream = await self._get_async_client().chat(**kwargs)
+                return await anext(stream, None), stream
+            except ResponseError as e:
+                if not self._drop_unsupported(kwargs, e):
+                    raise
+    
+    async def astream_response_with_tool_execution(
+        self,
+        conversation: Conversation,
+        parameters: Optional[ModelParameters] = None,
+        tools: Optional[List[Callable]] = None,
+        auto_execute: bool = True,
+        tool_registry: Optional[ToolRegistry] = None
+    ) -> AsyncIterator[GenerationResponse]:
+        """Asynchronously generate a streaming response with automatic tool execution.
+        
+        Args:
+            conversation: The conversation to generate a response for
+            parameters: Optional model parameters to use for generation
+            tools: Optional list of Python functions that can be called by the model
+            auto_execute: Whether to automatically execute tool calls and continue streaming
+            tool_registry: Optional pre-configured ToolRegistry (for MCP executors, etc.)
+            
+        Yields:
+            GenerationResponse chunks, tool execution results, and final response chunks
+        """
+        # Collect initial response and tool calls
+        content_parts = []
+        collected_tool_calls = []
+        
+        # Stream initial response
+        async for chunk in self.astream_response(conversation, parameters, tools):
+            if chunk.content:
+                content_parts.append(chunk.content)
+            
+            if chunk.tool_calls:
+                collected_tool_calls.extend(chunk.tool_calls)
+            
+            yield chunk
+        
+        # If no tool calls or auto_execute is False, we're done
+        if not collected_tool_calls or not auto_execute or not tools:
+            return
+        
+        # Use provided registry or the cached one for these tools
+        if tool_registry is None:
+            tool_registry = self._get_tool_registry(tools)
+        else:
+            for tool in tools:
+                tool_registry.register(tool)
+        
+        # Run the tool calls concurrently in the tool thread pool, so blocking
+        # tool functions do not stall the event loop
+        loop = asyncio.get_running_loop()
+        tool_results = await asyncio.gather(*(
+            loop.run_in_executor(_TOOL_EXECUTOR, tool_registry.execute_tool_call, tool_call)
+            for tool_call in collected_tool_calls
+        ))
+        
+        for result in tool_results:
+            # Yield tool execution result
+            yield GenerationResponse(
+                model_name=conversation.model_name,
+                content="",
+                tool_results=[result]
+            )
+        
+        # Create temporary conversation with tool results
+        temp_conversation = conversation.fork()
+        
+        # Add assistant message with tool calls
+        assistant_msg = temp_conversation.add_assistant_message("".join(content_parts))
+        assistant_msg.tool_calls = collected_tool_calls
+        
+        # Add tool result messages
+        temp_conversation.add_tool_results(tool_results)
+        
+        # Stream final response
+        async for chunk in self.astream_response(temp_conversation, parameters):
+            yield chunk
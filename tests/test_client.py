@@ -0,0 +1,122 @@
+"""Tests for the OllamaChatClient."""
+
+import asyncio
+
+from unittest.mock import patch, AsyncMock
+
+from src.qv_ollama_sdk.client import OllamaChatClient
+
+
+@patch("ollama.Client.chat")
+def test_chat_response_cache(mock_chat):
+    """Test that a repeated question is answered from the response cache."""
+    mock_chat.return_value = {"message": {"role": "assistant", "content": "Paris."}}
+    
+    client = OllamaChatClient(model_name="llama3", cache_responses=True)
+    client.temperature = 0.0
+    first = client.chat("What is the capital of France?")
+    
+    # Ask the same question in a fresh conversation
+    client.clear_history()
+    second = client.chat("What is the capital of France?")
+    
+    assert mock_chat.call_count == 1
+    assert second is first
+    assert [msg["content"] for msg in client.get_history()] == ["What is the capital of France?", "Paris."]
+
+
+@patch("ollama.AsyncClient.chat", new_callable=AsyncMock)
+def test_gather_chat(mock_chat):
+    """Test that independent questions are sent concurrently without changing the history."""
+    async def answer(**kwargs):
+        question = kwargs["messages"][-1]["content"]
+        return {"message": {"role": "assistant", "content": f"Answer to {question}"}}
+    mock_chat.side_effect = answer
+    
+    client = OllamaChatClient(model_name="llama3", system_message="You are a helpful assistant.")
+    responses = asyncio.run(client.gather_chat(["A?", "B?"]))
+    
+    assert [response.content for response in responses] == ["Answer to A?", "Answer to B?"]
+    assert mock_chat.await_count == 2
+    assert len(client.get_history()) == 1
+
+
+@patch("ollama.Client.chat")
+def test_stream_chat_batches_chunks(mock_chat):
+    """Test that stream_batch_ms joins content chunks but keeps the history intact."""
+    mock_chat.return_value = iter([
+        {"message": {"role": "assistant", "content": "Hel"}},
+        {"message": {"role": "assistant", "content": "lo"}},
+        {"message": {"role": "assistant", "content": " world"}},
+        {"message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "stop"}
+    ])
+    
+    client = OllamaChatClient(model_name="llama3", stream_batch_ms=1000)
+    chunks = list(client.stream_chat("Hi"))
+    
+    assert [chunk.content for chunk in chunks] == ["Hello world", ""]
+    assert client.get_history()[-1]["content"] == "Hello world"
+
+
+@patch("ollama.Client.chat")
+def test_stream_chat_with_tools_history(mock_chat):
+    """Test that the answer streamed after the tool results is stored as its own message."""
+    def add_numbers(a: int, b: int) -> int:
+        """Add two numbers."""
+        return a + b
+    
+    mock_chat.side_effect = [
+        iter([
+            {"message": {"role": "assistant", "content": "Let me add.", "tool_calls": [
+                {"function": {"name": "add_numbers", "arguments": {"a": 2, "b": 3}}}
+            ]}}
+        ]),
+        iter([
+            {"message": {"role": "assistant", "content": "The sum "}},
+            {"message": {"role": "assistant", "content": "is 5."}}
+        ])
+    ]
+    
+    client = OllamaChatClient(model_name="llama3")
+    list(client.stream_chat("What is 2 + 3?", tools=[add_numbers]))
+    
+    history = client.get_history()
+    assert [msg["role"] for msg in history] == ["user", "assistant", "tool", "assistant"]
+    assert history[1]["content"] == "Let me add."
+    assert history[1]["tool_calls"][0]["function"]["name"] == "add_numbers"
+    assert history[2]["content"] == "5"
+    assert history[3]["content"] == "The sum is 5."
+
+
+@patch("ollama.Client.chat")
+def test_chat_response_cache_needs_reproducible_parameters(mock_chat):
+    """Test that sampled responses are not cached unless a seed is set."""
+    mock_chat.return_value = {"message": {"role": "assistant", "content": "Paris."}}
+    
+    client = OllamaChatClient(model_name="llama3", cache_responses=True)
+    client.temperature = 0.1
+    for _ in range(2):
+        client.clear_history()
+        client.chat("What is the capital of France?")
+    assert mock_chat.call_count == 2
+    
+    client.set_parameters(seed=42)
+    for _ in range(2):
+        client.clear_history()
+        client.chat("What is the capital of France?")
+    assert mock_chat.call_count == 3
+
+
+@patch("ollama.AsyncClient.chat", new_callable=AsyncMock)
+def test_achat_response_cache(mock_chat):
+    """Test that achat() uses the response cache like chat()."""
+    mock_chat.return_value = {"message": {"role": "assistant", "content": "Paris."}}
+    
+    client = OllamaChatClient(model_name="llama3", cache_responses=True)
+    client.temperature = 0.0
+    first = asyncio.run(client.achat("What is the capital of France?"))
+    client.clear_history()
+    second = asyncio.run(client.achat("What is the capital of France?"))
+    
+    assert mock_chat.await_count == 1
+    assert second is first
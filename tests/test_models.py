@@ -1,15 +1,22 @@
 """Tests for the domain models."""
 
+import copy
+import pickle
 import pytest
+from dataclasses import asdict, fields
 from datetime import datetime
 from uuid import UUID
 
+from src.qv_ollama_sdk.domain import models
 from src.qv_ollama_sdk.domain.models import (
     MessageRole,
     Message,
     Conversation,
     ModelParameters,
-    GenerationResponse
+    GenerationResponse,
+    Function,
+    ToolCall,
+    ToolRegistry
 )
 
 
@@ -45,24 +52,37 @@ def test_conversation_creation():
     assert isinstance(conversation.metadata, dict)
 
 
-def test_conversation_add_messages():
+@pytest.mark.parametrize("add_method, role, content", [
+    ("add_system_message", MessageRole.SYSTEM, "You are a helpful assistant."),
+    ("add_user_message", MessageRole.USER, "Hello"),
+    ("add_assistant_message", MessageRole.ASSISTANT, "Hi there!"),
+])
+def test_conversation_add_messages(add_method, role, content):
     """Test adding messages to a conversation."""
     conversation = Conversation(model_name="llama3")
+    conversation.add_user_message("Earlier message")
     
-    system_msg = conversation.add_system_message("You are a helpful assistant.")
-    assert len(conversation.messages) == 1
-    assert conversation.messages[0].role == MessageRole.SYSTEM
-    assert conversation.messages[0].content == "You are a helpful assistant."
-    
-    user_msg = conversation.add_user_message("Hello")
+    message = getattr(conversation, add_method)(content)
     assert len(conversation.messages) == 2
+    assert conversation.messages[1] is message
+    assert message.role == role
+    assert message.content == content
+
+
+def test_conversation_extend_messages():
+    """Test adding several messages to a conversation at once."""
+    conversation = Conversation(model_name="llama3")
+    
+    messages = conversation.extend_messages([
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": "Hello"}
+    ])
+    
+    assert len(messages) == 2
+    assert conversation.messages == messages
+    assert conversation.messages[0].role == MessageRole.SYSTEM
     assert conversation.messages[1].role == MessageRole.USER
     assert conversation.messages[1].content == "Hello"
-    
-    assistant_msg = conversation.add_assistant_message("Hi there!")
-    assert len(conversation.messages) == 3
-    assert conversation.messages[2].role == MessageRole.ASSISTANT
-    assert conversation.messages[2].content == "Hi there!"
 
 
 def test_conversation_get_message_history():
@@ -109,7 +129,7 @@ def test_model_parameters_creation():
     assert params.temperature == 0.5
     assert params.top_p == 0.8
     assert params.max_tokens == 1000
-    assert params.stop_sequences == []
+    assert params.stop is None
 
 
 def test_model_parameters_to_dict():
@@ -118,15 +138,19 @@ def test_model_parameters_to_dict():
         temperature=0.5,
         top_p=0.8,
         max_tokens=1000,
-        stop_sequences=["END", "STOP"]
+        stop=["END", "STOP"],
+        seed=42
     )
     
     params_dict = params.to_dict()
     
-    assert params_dict["temperature"] == 0.5
-    assert params_dict["top_p"] == 0.8
-    assert params_dict["max_tokens"] == 1000
-    assert params_dict["stop"] == ["END", "STOP"]
+    assert params_dict == {
+        "temperature": 0.5,
+        "top_p": 0.8,
+        "num_predict": 1000,
+        "stop": ["END", "STOP"],
+        "seed": 42
+    }
 
 
 def test_generation_response_creation():
@@ -143,4 +167,360 @@ def test_generation_response_creation():
     assert response.content == "Hello, how can I help you?"
     assert response.finish_reason == "stop"
     assert response.usage == {"prompt_tokens": 10, "completion_tokens": 8}
-    assert isinstance(response.created_at, datetime) 
\ No newline at end of file
+    assert isinstance(response.created_at, datetime) 
+
+def test_conversation_compact():
+    """Test folding earlier turns into one compact message."""
+    conversation = Conversation(model_name="llama3")
+    conversation.add_system_message("You are a helpful assistant.")
+    conversation.add_user_message("What is the capital of France?")
+    conversation.add_assistant_message("Paris.")
+    conversation.add_user_message("And of Germany?")
+    
+    compacted = conversation.compact()
+    
+    assert [msg.role for msg in compacted.messages] == [MessageRole.SYSTEM, MessageRole.USER, MessageRole.USER]
+    assert compacted.messages[1].content == (
+        "Conversation so far:\nrole|content\n"
+        "user|What is the capital of France?\nassistant|Paris."
+    )
+    assert compacted.messages[2].content == "And of Germany?"
+    assert len(conversation.messages) == 4
+
+
+def test_conversation_set_system_message():
+    """Test replacing the system message in place."""
+    conversation = Conversation(model_name="llama3")
+    conversation.add_system_message("You are a helpful assistant.")
+    conversation.add_user_message("Hello")
+    conversation.add_system_message("Answer briefly.")
+    conversation.add_assistant_message("Hi!")
+    
+    conversation.set_system_message("You are a pirate.")
+    
+    assert [(msg.role, msg.content) for msg in conversation.messages] == [
+        (MessageRole.SYSTEM, "You are a pirate."),
+        (MessageRole.USER, "Hello"),
+        (MessageRole.ASSISTANT, "Hi!")
+    ]
+
+
+def test_model_parameters_unset():
+    """Test that unset or cleared parameters are not sent to the API."""
+    params = ModelParameters(temperature=0.5, think=True)
+    assert params.to_dict() == {"temperature": 0.5}
+    
+    params.temperature = None
+    params.top_k = 20
+    
+    assert params.to_dict() == {"top_k": 20}
+    assert params.think is True
+
+
+def test_conversation_message_history_cache():
+    """Test that the cached message history follows added and replaced messages."""
+    conversation = Conversation(model_name="llama3")
+    conversation.add_user_message("Hello")
+    assert conversation.get_message_history() == [{"role": "user", "content": "Hello"}]
+    
+    conversation.add_assistant_message("Hi!")
+    assert [msg["content"] for msg in conversation.get_message_history()] == ["Hello", "Hi!"]
+    
+    # Replace the last message directly in the list
+    conversation.messages.pop()
+    conversation.add_assistant_message("Hello there!")
+    assert [msg["content"] for msg in conversation.get_message_history()] == ["Hello", "Hello there!"]
+    
+    conversation.set_system_message("Be brief.")
+    assert [msg["role"] for msg in conversation.get_message_history()] == ["system", "user", "assistant"]
+
+
+def test_conversation_message_history_returns_copies():
+    """Test that changing the returned history does not change the conversation."""
+    conversation = Conversation(model_name="llama3")
+    conversation.add_user_message("Hello")
+    digest = conversation.state_hash()
+    
+    conversation.get_message_history()[0]["content"] = "MUTATED"
+    
+    assert conversation.get_message_history() == [{"role": "user", "content": "Hello"}]
+    assert conversation._request_messages() == [{"role": "user", "content": "Hello"}]
+    assert conversation.state_hash() == digest
+
+
+def test_tool_registry_casts_annotated_arguments():
+    """Test that tool arguments are cast to the annotated parameter types."""
+    def describe(name: str, count: int, factor: float, extra=None) -> str:
+        return f"{name}:{count!r}:{factor!r}:{extra!r}"
+    
+    registry = ToolRegistry()
+    registry.register(describe)
+    
+    result = registry.execute_tool_call(ToolCall(function=Function(
+        name="describe",
+        arguments={"name": 42, "count": "3", "factor": "2", "extra": "7"}
+    )))
+    
+    assert result.error is None
+    assert result.result == "42:3:2.0:7"
+
+
+def test_generation_response_kind():
+    """Test the kind bitmask of a generation response."""
+    assert GenerationResponse(model_name="llama3", content="").kind == 0
+    
+    response = GenerationResponse(
+        model_name="llama3",
+        content="Paris.",
+        thinking="The capital of France is Paris.",
+        tool_calls=[ToolCall(function=Function(name="lookup", arguments={}))]
+    )
+    
+    assert response.kind == GenerationResponse.THINKING | GenerationResponse.CONTENT | GenerationResponse.TOOL_CALLS
+    assert not response.kind & GenerationResponse.TOOL_RESULTS
+
+
+def test_conversation_state_hash():
+    """Test that the state hash follows the message history."""
+    conversation = Conversation(model_name="llama3")
+    conversation.add_user_message("Hello")
+    first = conversation.state_hash()
+    
+    other = Conversation(model_name="llama3")
+    other.add_user_message("Hello")
+    assert other.state_hash() == first
+    
+    conversation.add_assistant_message("Hi!")
+    assert conversation.state_hash() != first
+    
+    conversation.messages.pop()
+    assert conversation.state_hash() == first
+
+
+def test_message_id_with_slots():
+    """Test that a slotted message keeps a given id and generates a stable one otherwise."""
+    given = UUID("12345678-1234-5678-1234-567812345678")
+    
+    assert Message(role=MessageRole.USER, content="Hi", id=given).id == given
+    message = Message(role=MessageRole.USER, content="Hi")
+    assert message.id == message.id
+    assert not hasattr(message, "__dict__")
+
+
+def test_conversation_set_system_message_keeps_history_cache():
+    """Test that replacing the system message patches the cached history and hash."""
+    conversation = Conversation(model_name="llama3")
+    conversation.add_system_message("You are a helpful assistant.")
+    conversation.add_user_message("Hello")
+    conversation.state_hash()
+    cached_user_dict = conversation._history_cache[1]
+    
+    conversation.set_system_message("You are a pirate.")
+    
+    expected = Conversation(model_name="llama3")
+    expected.add_system_message("You are a pirate.")
+    expected.add_user_message("Hello")
+    assert conversation.get_message_history() == expected.get_message_history()
+    assert conversation._history_cache[1] is cached_user_dict
+    assert conversation.state_hash() == expected.state_hash()
+
+
+def test_tool_registry_casts_numeric_strings():
+    """Test that numeric strings of unannotated arguments are cast to numbers."""
+    def echo(**kwargs):
+        return kwargs
+    
+    registry = ToolRegistry()
+    registry.register(echo)
+    tool_call = ToolCall(function=Function(
+        name="echo",
+        arguments={"a": "-3", "b": "2.5e1", "c": "nan", "d": "12 apples", "e": 7}
+    ))
+    
+    result = registry.execute_tool_call(tool_call)
+    
+    assert result.result == {"a": -3, "b": 25.0, "c": "nan", "d": "12 apples", "e": 7}
+    assert isinstance(result.result["a"], int)
+
+
+def test_message_from_db_dicts():
+    """Test loading several stored messages at once."""
+    messages = [
+        Message(role=MessageRole.USER, content="Hello"),
+        Message(role=MessageRole.ASSISTANT, content="Hi!")
+    ]
+    
+    loaded = Message.from_db_dicts([message.to_db_dict() for message in messages])
+    
+    assert [(msg.id, msg.role, msg.content) for msg in loaded] == [
+        (msg.id, msg.role, msg.content) for msg in messages
+    ]
+    with pytest.raises(ValueError):
+        Message.from_db_dicts([{**messages[0].to_db_dict(), "role": "robot"}])
+
+
+def test_conversation_max_messages():
+    """Test that the oldest turns are dropped once max_messages is reached."""
+    conversation = Conversation(model_name="llama3", max_messages=3)
+    conversation.add_system_message("You are a helpful assistant.")
+    conversation.add_user_message("One")
+    conversation.add_assistant_message("1")
+    conversation.get_message_history()
+    
+    conversation.add_user_message("Two")
+    
+    expected = Conversation(model_name="llama3")
+    expected.add_system_message("You are a helpful assistant.")
+    expected.add_assistant_message("1")
+    expected.add_user_message("Two")
+    assert conversation.get_message_history() == expected.get_message_history()
+    assert conversation.state_hash() == expected.state_hash()
+
+
+def test_conversation_max_messages_keeps_newest_tool_round():
+    """Test that trimming never drops the newest tool call and its results."""
+    conversation = Conversation(model_name="llama3", max_messages=2)
+    conversation.add_user_message("Add 1 + 2 and 3 + 4")
+    assistant = conversation.add_assistant_message("")
+    assistant.tool_calls = [
+        ToolCall(function=Function(name="add", arguments={"a": 1, "b": 2}), id="call_1"),
+        ToolCall(function=Function(name="add", arguments={"a": 3, "b": 4}), id="call_2")
+    ]
+    conversation.add_tool_message("3", tool_call_id="call_1", function_name="add")
+    conversation.add_tool_message("7", tool_call_id="call_2", function_name="add")
+    
+    assert [msg.role for msg in conversation.messages] == [MessageRole.ASSISTANT, MessageRole.TOOL, MessageRole.TOOL]
+    assert conversation.messages[0] is assistant
+
+
+def test_conversation_max_messages_trims_constructor_messages():
+    """Test that messages passed to the constructor are trimmed as well."""
+    messages = [Message(role=MessageRole.SYSTEM, content="Be brief.")]
+    messages += [Message(role=MessageRole.USER, content=str(number)) for number in range(4)]
+    
+    conversation = Conversation(model_name="llama3", messages=messages, max_messages=3)
+    
+    assert [msg.content for msg in conversation.messages] == ["Be brief.", "2", "3"]
+
+
+def test_conversation_fork():
+    """Test that a fork reuses the cached history without changing the original."""
+    conversation = Conversation(model_name="llama3")
+    conversation.add_user_message("Hello")
+    history = conversation._request_messages()
+    
+    forked = conversation.fork()
+    forked.add_assistant_message("Hi!")
+    
+    assert forked._request_messages()[0] is history[0]
+    assert len(conversation.messages) == 1
+    
+    expected = Conversation(model_name="llama3")
+    expected.add_user_message("Hello")
+    expected.add_assistant_message("Hi!")
+    assert forked.state_hash() == expected.state_hash()
+
+
+def test_conversation_copy_and_pickle():
+    """Test that a conversation with a history hash can be copied and pickled."""
+    conversation = Conversation(model_name="llama3")
+    conversation.add_user_message("Hello")
+    digest = conversation.state_hash()
+    
+    copied = copy.deepcopy(conversation)
+    restored = pickle.loads(pickle.dumps(conversation))
+    
+    assert copied.state_hash() == digest
+    assert restored.state_hash() == digest
+    assert restored.id == conversation.id
+    assert restored == conversation
+    assert asdict(conversation)["messages"][0]["content"] == "Hello"
+    assert "_history_cache" not in asdict(conversation)
+
+
+@pytest.mark.parametrize("cls, names", [
+    (Message, ["role", "content", "images", "id", "created_at", "metadata",
+               "tool_calls", "tool_call_id"]),
+    (ToolCall, ["function", "id"]),
+    (ToolRegistry, ["functions", "mcp_executors"]),
+    (Conversation, ["model_name", "id", "title", "messages", "created_at", "updated_at",
+                    "metadata", "max_messages"]),
+    (GenerationResponse, ["model_name", "content", "id", "created_at", "raw_response",
+                          "finish_reason", "usage", "tool_calls", "tool_results",
+                          "thinking", "kind"]),
+])
+def test_private_state_is_not_a_dataclass_field(cls, names):
+    """Test that private bookkeeping is not part of the public dataclass fields."""
+    assert [f.name for f in fields(cls)] == names
+
+
+def test_message_id_survives_copy_and_pickle():
+    """Test that a lazily generated id is kept by copies and pickling."""
+    message = Message(role=MessageRole.USER, content="Hello")
+    message_id = message.id
+    
+    restored = pickle.loads(pickle.dumps(message))
+    
+    assert restored.id == message_id
+    assert copy.deepcopy(message).id == message_id
+    assert restored == message
+    assert "_id" not in asdict(message)
+
+
+def test_conversation_updated_at_survives_copy_and_pickle():
+    """Test that a pending updated_at timestamp is kept by copies and pickling."""
+    conversation = Conversation(model_name="llama3")
+    conversation.add_user_message("Hello")
+    
+    restored = pickle.loads(pickle.dumps(conversation))
+    copied = copy.deepcopy(conversation)
+    
+    assert restored.updated_at == conversation.updated_at
+    assert copied.updated_at == conversation.updated_at
+    assert "_updated_at" not in asdict(conversation)
+
+
+def test_tool_registry_casts_constructor_functions():
+    """Test that functions passed to the constructor get their argument casts."""
+    def echo(value: str):
+        return value
+    
+    registry = ToolRegistry(functions={"echo": echo})
+    
+    result = registry.execute_tool_call(ToolCall(function=Function(
+        name="echo", arguments={"value": "42"}
+    )))
+    
+    assert result.result == "42"
+
+
+def test_tool_registry_keeps_non_string_arguments():
+    """Test that only string arguments are cast to the annotated types."""
+    def inspect_args(count: int, name: str, options: str, flag: int):
+        return count, name, options, flag
+    
+    registry = ToolRegistry()
+    registry.register(inspect_args)
+    
+    result = registry.execute_tool_call(ToolCall(function=Function(
+        name="inspect_args",
+        arguments={"count": 2.7, "name": None, "options": {"a": 1}, "flag": True}
+    )))
+    
+    assert result.error is None
+    assert result.result == (2.7, None, {"a": 1}, True)
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_conversation_state_hash_with_non_str_keys(monkeypatch, use_orjson):
+    """Test that tool arguments with non-string keys hash with both JSON backends."""
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(models, "orjson", None)
+    
+    conversation = Conversation(model_name="llama3")
+    message = conversation.add_assistant_message("")
+    message.tool_calls = [ToolCall(function=Function(name="lookup", arguments={"table": {1: "a", 2: "b"}}))]
+    
+    assert len(conversation.state_hash()) == 16
@@ -1,38 +1,76 @@
 """Tests for the OllamaConversationService."""
 
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from ollama import ResponseError
 
 from src.qv_ollama_sdk.domain.models import (
     MessageRole,
     Message,
     Conversation,
     ModelParameters,
-    GenerationResponse
+    GenerationResponse,
+    ToolRegistry
 )
 from src.qv_ollama_sdk.services.ollama_conversation_service import OllamaConversationService
 
 
+# Contents of the chunks of the mocked streams
+STREAM_TOKENS = ("The ", "capital ", "of ", "France ", "is ", "Paris.")
+
+
+@pytest.fixture(scope="module")
+def _patched_chat():
+    """Patch the sync and async chat methods once for all tests of the module."""
+    with patch("ollama.Client.chat") as chat, \
+            patch("ollama.AsyncClient.chat", new_callable=AsyncMock) as achat:
+        yield chat, achat
+
+
+@pytest.fixture
+def mock_chat(_patched_chat):
+    """Get the patched Client.chat, reset for the test."""
+    chat = _patched_chat[0]
+    chat.reset_mock(return_value=True, side_effect=True)
+    return chat
+
+
 @pytest.fixture
+def mock_achat(_patched_chat):
+    """Get the patched AsyncClient.chat, reset for the test."""
+    achat = _patched_chat[1]
+    achat.reset_mock(return_value=True, side_effect=True)
+    return achat
+
+
+@pytest.fixture(scope="module")
+def service():
+    """Create a service shared by the synchronous tests."""
+    return OllamaConversationService()
+
+
+@pytest.fixture(scope="module")
 def conversation():
-    """Create a test conversation."""
+    """Create a test conversation (shared by the tests, which must not change it)."""
     conversation = Conversation(model_name="llama3")
     conversation.add_system_message("You are a helpful assistant.")
     conversation.add_user_message("What is the capital of France?")
     return conversation
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def parameters():
-    """Create test model parameters."""
+    """Create test model parameters (shared by the tests, which must not change them)."""
     return ModelParameters(
         temperature=0.7,
         max_tokens=500
     )
 
 
-@patch("ollama.chat")
-def test_generate_response(mock_chat, conversation, parameters):
+def test_generate_response(mock_chat, service, conversation, parameters):
     """Test generating a response."""
     # Setup the mock
     mock_response = {
@@ -46,8 +84,7 @@ def test_generate_response(mock_chat, conversation, parameters):
     }
     mock_chat.return_value = mock_response
     
-    # Create the service and generate a response
-    service = OllamaConversationService()
+    # Generate a response
     response = service.generate_response(conversation, parameters)
     
     # Check the mock was called correctly
@@ -64,23 +101,20 @@ def test_generate_response(mock_chat, conversation, parameters):
     assert response.raw_response == mock_response
 
 
-@patch("ollama.chat")
-def test_stream_response(mock_chat, conversation, parameters):
+@pytest.mark.parametrize("mock_chunks, expected", [
+    (
+        [{"message": {"content": token}} for token in STREAM_TOKENS],
+        list(STREAM_TOKENS)
+    ),
+    (
+        [{"message": {"content": "The capital of France is Paris."}}],
+        ["The capital of France is Paris."]
+    ),
+])
+def test_stream_response(mock_chat, service, mock_chunks, expected, conversation, parameters):
     """Test streaming a response."""
-    # Setup the mock
-    mock_chunks = [
-        {"message": {"content": "The "}},
-        {"message": {"content": "capital "}},
-        {"message": {"content": "of "}},
-        {"message": {"content": "France "}},
-        {"message": {"content": "is "}},
-        {"message": {"content": "Paris."}}
-    ]
     mock_chat.return_value = mock_chunks
     
-    # Create the service
-    service = OllamaConversationService()
-    
     # Call stream_response and collect the chunks
     chunks = list(service.stream_response(conversation, parameters))
     
@@ -93,11 +127,10 @@ def test_stream_response(mock_chat, conversation, parameters):
     )
     
     # Check the chunks
-    assert chunks == ["The ", "capital ", "of ", "France ", "is ", "Paris."]
+    assert [chunk.content for chunk in chunks] == expected
 
 
-@patch("ollama.chat")
-def test_generate_response_without_parameters(mock_chat, conversation):
+def test_generate_response_without_parameters(mock_chat, service, conversation):
     """Test generating a response without parameters."""
     # Setup the mock
     mock_response = {
@@ -109,8 +142,7 @@ def test_generate_response_without_parameters(mock_chat, conversation):
     }
     mock_chat.return_value = mock_response
     
-    # Create the service and generate a response
-    service = OllamaConversationService()
+    # Generate a response
     response = service.generate_response(conversation)
     
     # Check the mock was called with default parameters
@@ -121,4 +153,279 @@ def test_generate_response_without_parameters(mock_chat, conversation):
     
     # Check the response
     assert response.model_name == "llama3"
-    assert response.content == "The capital of France is Paris." 
\ No newline at end of file
+    assert response.content == "The capital of France is Paris."
+
+
+def test_agenerate_response(mock_achat, conversation, parameters):
+    """Test generating a response asynchronously."""
+    # Setup the mock
+    mock_response = {
+        "model": "llama3",
+        "message": {
+            "role": "assistant",
+            "content": "The capital of France is Paris."
+        },
+        "done": True
+    }
+    mock_achat.return_value = mock_response
+    
+    # Create the service and generate a response
+    service = OllamaConversationService()
+    response = asyncio.run(service.agenerate_response(conversation, parameters))
+    
+    # Check the mock was called correctly
+    mock_achat.assert_awaited_once_with(
+        model=conversation.model_name,
+        messages=conversation.get_message_history(),
+        options=parameters.to_dict()
+    )
+    
+    # Check the response
+    assert response.model_name == "llama3"
+    assert response.content == "The capital of France is Paris."
+    assert response.raw_response == mock_response
+
+
+def test_astream_response(mock_achat, conversation, parameters):
+    """Test streaming a response asynchronously."""
+    # Setup the mock
+    async def mock_stream():
+        for content in STREAM_TOKENS:
+            yield {"message": {"content": content}}
+    mock_achat.return_value = mock_stream()
+    
+    # Create the service
+    service = OllamaConversationService()
+    
+    # Call astream_response and collect the chunks
+    async def collect():
+        return [chunk async for chunk in service.astream_response(conversation, parameters)]
+    chunks = asyncio.run(collect())
+    
+    # Check the mock was called correctly
+    mock_achat.assert_awaited_once_with(
+        model=conversation.model_name,
+        messages=conversation.get_message_history(),
+        options=parameters.to_dict(),
+        stream=True
+    )
+    
+    # Check the chunks
+    assert [chunk.content for chunk in chunks] == list(STREAM_TOKENS)
+
+
+def test_generate_response_with_keep_alive(mock_chat, service, conversation):
+    """Test that keep_alive and think are sent as request fields, not options."""
+    mock_chat.return_value = {"message": {"role": "assistant", "content": "Paris."}}
+    parameters = ModelParameters(temperature=0.7, think=True, keep_alive="30m")
+    
+    service.generate_response(conversation, parameters)
+    
+    call_args = mock_chat.call_args[1]
+    assert call_args["keep_alive"] == "30m"
+    assert call_args["think"] is True
+    assert call_args["options"] == {"temperature": 0.7}
+
+
+def test_astream_response_with_tool_execution(mock_achat, conversation, parameters):
+    """Test that tool calls are executed and their results streamed asynchronously."""
+    def add_numbers(a: str, b: str) -> str:
+        """Add two numbers."""
+        return str(int(a) + int(b))
+    
+    async def tool_call_stream():
+        yield {"message": {"content": "", "tool_calls": [
+            {"function": {"name": "add_numbers", "arguments": {"a": "15", "b": "27"}}},
+            {"function": {"name": "add_numbers", "arguments": {"a": "1", "b": "2"}}}
+        ]}}
+    
+    async def final_stream():
+        yield {"message": {"content": "The results are 42 and 3."}}
+    
+    mock_achat.side_effect = [tool_call_stream(), final_stream()]
+    
+    # Pass an empty registry, as the client does
+    service = OllamaConversationService()
+    
+    async def collect():
+        return [
+            chunk async for chunk in service.astream_response_with_tool_execution(
+                conversation, parameters, [add_numbers], tool_registry=ToolRegistry()
+            )
+        ]
+    chunks = asyncio.run(collect())
+    
+    # Check the results are streamed in the order of the tool calls
+    results = [result.result for chunk in chunks if chunk.tool_results for result in chunk.tool_results]
+    assert results == ["42", "3"]
+    assert chunks[-1].content == "The results are 42 and 3."
+
+
+def test_generate_response_passes_tool_functions(mock_chat, service, conversation):
+    """Test that tool functions are passed to ollama, which converts them."""
+    mock_chat.return_value = {"message": {"role": "assistant", "content": "42"}}
+    
+    def add_numbers(a: int, b: int) -> int:
+        """Add two numbers."""
+        return a + b
+    
+    service.generate_response(conversation, tools=[add_numbers])
+    
+    assert mock_chat.call_args[1]["tools"] == [add_numbers]
+
+
+def test_stream_response_splits_think_tags(mock_chat, service, conversation):
+    """Test that <think> blocks spanning several chunks are streamed as thinking."""
+    mock_chat.return_value = iter([
+        {"message": {"role": "assistant", "content": "<thi"}},
+        {"message": {"role": "assistant", "content": "nk>Paris is"}},
+        {"message": {"role": "assistant", "content": " the capital.</think>\n\n"}},
+        {"message": {"role": "assistant", "content": "Paris."}, "done": True}
+    ])
+    
+    chunks = list(service.stream_response(conversation))
+    
+    assert "".join(chunk.thinking or "" for chunk in chunks) == "Paris is the capital."
+    assert "".join(chunk.content for chunk in chunks) == "Paris."
+
+
+@pytest.mark.parametrize("mock_chunks, expected", [
+    (
+        [{"message": {"content": "a "}}, {"message": {"content": "<"}, "done": True}],
+        [("a ", None), ("<", True)]
+    ),
+    (
+        [{"message": {"content": "a <"}}, {"message": {"content": ""}, "done": True}],
+        [("a ", None), ("<", True)]
+    ),
+])
+def test_stream_response_keeps_held_back_text_in_done_chunk(mock_chat, service, conversation, mock_chunks, expected):
+    """Test that text held back for a possible tag ends up in the done chunk."""
+    mock_chat.return_value = iter(mock_chunks)
+    
+    chunks = list(service.stream_response(conversation))
+    
+    assert [(chunk.content, chunk.finish_reason) for chunk in chunks] == expected
+
+
+def test_service_with_host_uses_own_client():
+    """Test that services share a client unless connection settings are given."""
+    assert OllamaConversationService()._client is OllamaConversationService()._client
+    
+    service = OllamaConversationService(host="http://example.com:11434", timeout=5)
+    
+    assert service._client is not OllamaConversationService()._client
+    assert str(service._client._client.base_url) == "http://example.com:11434"
+
+
+def test_generate_response_remembers_unsupported_tools(mock_chat, service):
+    """Test that tools are left out of later requests once a model rejected them."""
+    def add_numbers(a: int, b: int) -> int:
+        """Add two numbers."""
+        return a + b
+    
+    mock_chat.side_effect = [
+        ResponseError("registry.ollama.ai/library/tiny-model does not support tools", 400),
+        {"message": {"role": "assistant", "content": "4"}},
+        {"message": {"role": "assistant", "content": "6"}}
+    ]
+    conversation = Conversation(model_name="tiny-model")
+    conversation.add_user_message("What is 2 + 2?")
+    
+    try:
+        assert service.generate_response(conversation, tools=[add_numbers]).content == "4"
+        assert service.generate_response(conversation, tools=[add_numbers]).content == "6"
+    finally:
+        OllamaConversationService._unsupported_features.clear()
+    
+    assert mock_chat.call_count == 3
+    assert "tools" in mock_chat.call_args_list[0].kwargs
+    assert "tools" not in mock_chat.call_args_list[1].kwargs
+    assert "tools" not in mock_chat.call_args_list[2].kwargs
+
+
+def test_generate_many_keeps_order(mock_achat):
+    """Test generating responses for several conversations at once."""
+    async def chat(**kwargs):
+        question = kwargs["messages"][-1]["content"]
+        return {"model": "llama3", "message": {"role": "assistant", "content": question.upper()}, "done": True}
+    mock_achat.side_effect = chat
+    
+    conversations = []
+    for question in ["one", "two", "three"]:
+        conversation = Conversation(model_name="llama3")
+        conversation.add_user_message(question)
+        conversations.append(conversation)
+    
+    service = OllamaConversationService()
+    responses = service.generate_many(conversations, concurrency=2)
+    
+    assert [response.content for response in responses] == ["ONE", "TWO", "THREE"]
+    assert mock_achat.await_count == 3
+
+
+def test_tool_registry_reused_for_same_tools():
+    """Test that calls with the same tools share one registry."""
+    def add(a: int, b: int) -> int:
+        """Add two numbers."""
+        return a + b
+    
+    service = OllamaConversationService()
+    registry = service._get_tool_registry([add])
+    
+    assert service._get_tool_registry([add]) is registry
+    assert registry.get_function("add") is add
+    
+    # Registries of one-off tool lists are dropped, least recently used first
+    for _ in range(OllamaConversationService.TOOL_REGISTRY_CACHE_SIZE - 1):
+        service._get_tool_registry([lambda: None])
+    assert service._get_tool_registry([add]) is registry
+    service._get_tool_registry([lambda: None])
+    assert len(service._tool_registries) == OllamaConversationService.TOOL_REGISTRY_CACHE_SIZE
+    assert service._get_tool_registry([add]) is registry
+
+
+def test_generate_response_caches_deterministic_requests(mock_chat, conversation):
+    """Test that a repeated request with temperature=0 is answered from the cache."""
+    mock_chat.return_value = {"model": "llama3", "message": {"role": "assistant", "content": "Paris."}, "done": True}
+    service = OllamaConversationService(cache_responses=True)
+    
+    first = service.generate_response(conversation, ModelParameters(temperature=0))
+    second = service.generate_response(conversation, ModelParameters(temperature=0))
+    service.generate_response(conversation, ModelParameters(temperature=0.7))
+    
+    assert second is first
+    assert mock_chat.call_count == 2
+
+
+def test_response_cache_drops_least_recently_used(mock_chat, conversation, monkeypatch):
+    """Test that a cache hit keeps its response in the full cache."""
+    monkeypatch.setattr(OllamaConversationService, "RESPONSE_CACHE_SIZE", 2)
+    mock_chat.return_value = {"model": "llama3", "message": {"role": "assistant", "content": "Paris."}, "done": True}
+    service = OllamaConversationService(cache_responses=True)
+    
+    first = service.generate_response(conversation, ModelParameters(temperature=0))
+    service.generate_response(conversation, ModelParameters(temperature=0, seed=1))
+    assert service.generate_response(conversation, ModelParameters(temperature=0)) is first
+    service.generate_response(conversation, ModelParameters(temperature=0, seed=2))
+    
+    assert service.generate_response(conversation, ModelParameters(temperature=0)) is first
+    assert mock_chat.call_count == 3
+
+
+def test_generate_many_twice(mock_achat):
+    """Test that each event loop gets its own async client."""
+    mock_achat.return_value = {"model": "llama3", "message": {"role": "assistant", "content": "Paris."}, "done": True}
+    conversation = Conversation(model_name="llama3")
+    conversation.add_user_message("What is the capital of France?")
+    service = OllamaConversationService()
+    
+    assert service.generate_many([conversation])[0].content == "Paris."
+    assert service.generate_many([conversation])[0].content == "Paris."
+    
+    async def clients():
+        return service._get_async_client(), service._get_async_client()
+    first, same = asyncio.run(clients())
+    second, _ = asyncio.run(clients())
+    assert same is first
+    assert second is not first